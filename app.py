@@ -1,16 +1,19 @@
 import os
-import tempfile
 import speech_recognition as sr
 import re
+import uuid
 from datetime import date
 from backend.auth import register, login
-from backend.chatbot import generate_response
-from reports import create_pdf_report
+from backend.turn_pipeline import stream_chat_turn
+from backend.chatbot import end_session
 import pandas as pd
 import matplotlib.pyplot as plt
 from backend.db import get_region_list
-from backend.log_emotions import log_emotion
-from reports.emotion_trend_plot import load_data, render_dashboard, render_trend, render_calendar, render_alert
+from backend.categories import preload_categories
+from inference import start_background_loading
+from utils.audio import AudioClip
+from utils.tracing import trace, start_from_env as start_metrics_from_env
+from reports.emotion_trend_plot import load_report, report_pdf, render_dashboard, render_trend, render_calendar, render_alert
 from streamlit_option_menu import option_menu
 import streamlit as st
 
@@ -71,10 +74,32 @@ if "username" not in st.session_state:
     st.session_state.username = ""
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+if "session_id" not in st.session_state:
+    # 챗봇 대화 맥락은 브라우저 세션별로 따로 유지
+    st.session_state.session_id = uuid.uuid4().hex
+
+# 감정 분석 모델은 백그라운드에서 로드 (로그인/회원가입 화면은 바로 렌더링)
+start_background_loading()
+# 감정 카테고리 인덱스도 미리 읽어 둠
+preload_categories()
+# 구간별 지연 시간 내보내기 (WEAKEND_METRICS_PORT / WEAKEND_METRICS_LOG_INTERVAL)
+start_metrics_from_env()
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 2) 페이지별 함수 정의
 # ─────────────────────────────────────────────────────────────────────────────
+def chat_turn_html(user_msg: str, bot_msg: str) -> str:
+    return f'''
+                <div class="user-bubble-wrapper">
+                  <div class="user-bubble">{user_msg}</div>
+                </div>
+                <div class="chat-bubble">
+                  <img src="https://cdn-icons-png.flaticon.com/512/8229/8229494.png" width="24" />
+                  <div class="bot-bubble">{bot_msg}</div>
+                </div>
+            '''
+
+
 def login_page():
     st.image("mainimage.png", use_container_width=True)
 
@@ -162,24 +187,29 @@ def main_page():
         user_input = ""
 
         if audio_file:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                tmp.write(audio_file.read())
+            # 업로드 파일을 메모리에서 한 번만 디코딩해 음성 인식에 그대로 넘김 (임시 파일 없음)
+            try:
+                clip = AudioClip.from_bytes(audio_file.getvalue())
                 recognizer = sr.Recognizer()
-                with sr.AudioFile(tmp.name) as src:
-                    audio_data = recognizer.record(src)
-                    try:
-                        user_input = recognizer.recognize_google(audio_data, language="ko-KR")
-                        st.success(f"📝 변환된 텍스트: {user_input}")
-                    except:
-                        st.warning("음성 인식 실패. 텍스트로 입력해주세요.")
+                audio_data = sr.AudioData(clip.to_pcm16(), clip.sample_rate, 2)
+                user_input = recognizer.recognize_google(audio_data, language="ko-KR")
+                st.success(f"📝 변환된 텍스트: {user_input}")
+            except:
+                st.warning("음성 인식 실패. 텍스트로 입력해주세요.")
 
         if not user_input:
             user_input = st.text_input("📝 CHAT")
 
         if user_input:
-            log_emotion(st.session_state.username, "user", user_input)
-            bot_reply = generate_response(user_input)
-            log_emotion(st.session_state.username, "bot", bot_reply)
+            # 답변 생성과 감정 분석·저장을 동시에 진행, 답변은 토큰이 오는 대로 말풍선에 표시
+            live = st.empty()
+            bot_reply = ""
+            with trace("chat_turn"):
+                for delta in stream_chat_turn(st.session_state.username, user_input,
+                                              session_id=st.session_state.session_id):
+                    bot_reply += delta
+                    live.markdown(chat_turn_html(user_input, bot_reply + "▌"), unsafe_allow_html=True)
+            live.empty()    # 아래 대화 목록에 완성된 답변으로 다시 그려짐
             st.session_state.chat_history.append(("user", user_input))
             st.session_state.chat_history.append(("bot", bot_reply))
 
@@ -187,53 +217,48 @@ def main_page():
         paired = list(zip(st.session_state.chat_history[::2],
                           st.session_state.chat_history[1::2]))
         for u_msg, b_msg in (paired):
-            st.markdown(f'''
-                <div class="user-bubble-wrapper">
-                  <div class="user-bubble">{u_msg[1]}</div>
-                </div>
-                <div class="chat-bubble">
-                  <img src="https://cdn-icons-png.flaticon.com/512/8229/8229494.png" width="24" />
-                  <div class="bot-bubble">{b_msg[1]}</div>
-                </div>
-            ''', unsafe_allow_html=True)
+            st.markdown(chat_turn_html(u_msg[1], b_msg[1]), unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
     # 2️⃣ 감정 리포트
     elif page == "감정 리포트":
         st.title("감정 리포트")
 
-        # ① 데이터 로드
-        df = load_data(st.session_state.username)
+        # ① 데이터 로드 (메시지 행 + 일별 집계, 새 기록만 증분 반영)
+        df, daily = load_report(st.session_state.username)
         if df.empty:
             st.warning("로그인 후 대화를 먼저 진행해 주세요.")
             return
 
-        # ② yeji.py 의 여러 렌더 함수로 탭 구성
+        # ② yeji.py 의 여러 렌더 함수로 탭 구성 (일별 집계만 읽음)
         tab1, tab2, tab3, tab4 = st.tabs(
             ["대시보드", "감정 트렌드", "감정 달력", "맞춤 알림"]
         )
 
         with tab1:
-            render_dashboard(df)
+            render_dashboard(daily)
 
         with tab2:
-            render_trend(df)
+            render_trend(daily, df)
 
         with tab3:
-            render_calendar(df)
+            render_calendar(daily)
 
         with tab4:
-            render_alert(df)
+            render_alert(daily)
 
         # ③ (선택) PDF 다운로드 버튼
-        #    yeji.py 에 PDF 생성 로직이 없다면, 기존 create_pdf_report 유지
-        pdf_bytes = create_pdf_report(st.session_state.username)
-        st.download_button(
-            "📥 PDF Downlaod",
-            data=pdf_bytes,
-            file_name=f"{st.session_state.username}_감정리포트_{date.today()}.pdf",
-            mime="application/pdf",
-        )
+        #    버튼을 눌렀을 때만 위에서 불러온 데이터로 만들고, 데이터가 그대로면 사용자별 캐시를 재사용
+        if st.button("📄 PDF 만들기"):
+            st.session_state.pdf_requested = True
+        if st.session_state.get("pdf_requested"):
+            pdf_bytes = report_pdf(st.session_state.username)
+            st.download_button(
+                "📥 PDF Downlaod",
+                data=pdf_bytes,
+                file_name=f"{st.session_state.username}_감정리포트_{date.today()}.pdf",
+                mime="application/pdf",
+            )
 
     # 로그아웃
     logout_col, _ = st.columns([3, 1])
@@ -242,6 +267,8 @@ def main_page():
             st.session_state.logged_in = False
             st.session_state.page = "login"
             st.session_state.chat_history = []
+            st.session_state.pdf_requested = False
+            end_session(st.session_state.session_id)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 3) 라우팅: 로그인 상태/페이지 분기
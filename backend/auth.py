@@ -1,21 +1,21 @@
-from backend.db import supabase
+from backend.db import remember_userid, invalidate_userid
+from backend.storage import storage
 from datetime import datetime
+from utils.tracing import trace
 
 
 def register(login_id, password, birthdate, region_id, phonenumber, gender):
     try:
         # 1. 중복 ID 확인
-        id_check = supabase.table("users").select("login_id").eq("login_id", login_id).execute()
-        if id_check.data and len(id_check.data) > 0:
+        if storage.login_id_exists(login_id):
             return False, "이미 존재하는 아이디입니다."
 
         # 2. 중복 전화번호 확인
-        phone_check = supabase.table("users").select("phonenumber").eq("phonenumber", phonenumber).execute()
-        if phone_check.data and len(phone_check.data) > 0:
+        if storage.phonenumber_exists(phonenumber):
             return False, "이미 가입된 전화번호입니다."
 
         # 3. 회원 정보 삽입
-        insert_result = supabase.table("users").insert({
+        storage.insert_user({
             "login_id": login_id,
             "password": password,
             "birthdate": birthdate,
@@ -25,7 +25,8 @@ def register(login_id, password, birthdate, region_id, phonenumber, gender):
             "last_activity": datetime.now().isoformat(),   # @@나중에 세션 테이블에서 가져오는 걸로 바꾸기
             "signup_date": datetime.today().isoformat(),
             "role": "user"              
-        }).execute()
+        })
+        invalidate_userid(login_id)
 
         return True, "회원가입이 완료되었습니다."
 
@@ -37,12 +38,16 @@ def register(login_id, password, birthdate, region_id, phonenumber, gender):
     
     
 def login(login_id, password):
-    result = supabase.table("users").select("password").eq("login_id", login_id).execute()
-    if len(result.data) == 0:
+    with trace("db.users.select_password"):
+        user = storage.get_user_credentials(login_id)
+    if user is None:
         return False
-    if result.data[0]["password"] == password:
+    if user["password"] == password:
+        # 이후 채팅·리포트에서 userid 조회 round-trip 을 생략하도록 캐시에 넣어 둠
+        remember_userid(login_id, user["userid"])
         # 로그인 성공 시 last_activity 업데이트
         today = str(datetime.today())
-        supabase.table("users").update({"last_activity": today}).eq("login_id", login_id).execute()
+        with trace("db.users.update_last_activity"):
+            storage.update_last_activity(login_id, today)
         return True
     return False
\ No newline at end of file
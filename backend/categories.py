@@ -0,0 +1,106 @@
+import os
+import time
+import threading
+from backend.storage import storage
+from utils.tracing import trace
+
+# middle_categories 는 거의 바뀌지 않으므로 한 번 읽어 메모리에 두고 주기적으로만 새로 고침
+CATEGORY_REFRESH_SEC = float(os.getenv("WEAKEND_CATEGORY_REFRESH_SEC", "3600"))
+# 모르는 이름이 들어와도 인덱스가 이보다 최근에 읽힌 것이면 다시 읽지 않음 (잘못된 라벨마다 DB 를 치지 않도록)
+CATEGORY_MISS_REFRESH_SEC = float(os.getenv("WEAKEND_CATEGORY_MISS_REFRESH_SEC", "60"))
+
+
+class CategoryIndex:
+    """감정 카테고리 양방향 인덱스: 이름 ↔ middle_category_id ↔ main_category_id"""
+
+    def __init__(self, rows: list):
+        self.by_name = {}       # middle_categoryname → {"middle_category_id", "main_category_id"}
+        self.by_middle_id = {}  # middle_category_id → {"middle_categoryname", "main_category_id"}
+        self.by_main_id = {}    # main_category_id → [middle_category_id, ...]
+        for r in rows:
+            self.by_name[r["middle_categoryname"]] = {
+                "middle_category_id": r["middle_category_id"],
+                "main_category_id":   r["main_category_id"],
+            }
+            self.by_middle_id[r["middle_category_id"]] = {
+                "middle_categoryname": r["middle_categoryname"],
+                "main_category_id":    r["main_category_id"],
+            }
+            self.by_main_id.setdefault(r["main_category_id"], []).append(r["middle_category_id"])
+        self.loaded_at = time.monotonic()
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self.loaded_at > CATEGORY_REFRESH_SEC
+
+
+_index: CategoryIndex | None = None
+_lock = threading.Lock()
+_refreshing = threading.Event()
+
+
+def _fetch() -> CategoryIndex:
+    with trace("db.middle_categories.select_all"):
+        rows = storage.list_middle_categories()
+    return CategoryIndex(rows)
+
+
+def _refresh_in_background() -> None:
+    if _refreshing.is_set():
+        return
+    _refreshing.set()
+
+    def _run():
+        global _index
+        try:
+            _index = _fetch()
+        except Exception as e:
+            # 새로 고침에 실패하면 기존 인덱스를 계속 사용
+            print(f"[Warning] category index refresh failed: {e}")
+        finally:
+            _refreshing.clear()
+
+    threading.Thread(target=_run, name="category-refresh", daemon=True).start()
+
+
+def get_category_index(force_refresh: bool = False) -> CategoryIndex:
+    """
+    카테고리 인덱스를 반환합니다. 처음에는 DB에서 읽고,
+    이후 오래되면 기존 인덱스를 그대로 돌려주면서 백그라운드에서 새로 고칩니다.
+    """
+    global _index
+    if _index is None or force_refresh:
+        with _lock:
+            if _index is None or force_refresh:
+                _index = _fetch()
+        return _index
+    if _index.stale:
+        _refresh_in_background()
+    return _index
+
+
+def lookup_category(name: str) -> dict | None:
+    """
+    감정 라벨 이름 → {"middle_category_id", "main_category_id"}
+    모르는 이름이면 새로 고쳐 다시 찾되, CATEGORY_MISS_REFRESH_SEC 에 한 번까지만 DB 에서 읽습니다.
+    """
+    global _index
+    index = get_category_index()
+    cat = index.by_name.get(name)
+    if cat is None and time.monotonic() - index.loaded_at > CATEGORY_MISS_REFRESH_SEC:
+        with _lock:
+            if _index is index:     # 다른 스레드가 이미 새로 고쳤으면 그 결과를 사용
+                _index = _fetch()
+        cat = _index.by_name.get(name)
+    return cat
+
+
+def middle_category_names() -> dict:
+    """middle_category_id → middle_categoryname"""
+    return {mid: c["middle_categoryname"] for mid, c in get_category_index().by_middle_id.items()}
+
+
+def preload_categories() -> None:
+    """앱 시작 시 백그라운드에서 미리 읽어 둠 (첫 메시지에서 round-trip 이 생기지 않도록)"""
+    if _index is None:
+        _refresh_in_background()
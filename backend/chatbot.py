@@ -1,13 +1,12 @@
 import os
+from typing import Iterator
 from dotenv import load_dotenv
-from openai import OpenAI
 from openai.types.chat import ChatCompletionMessageParam
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# DB 저장 함수 가져오기
-from backend.db import save_message
+from backend.conversation import conversations
+from backend.llm_client import llm
 
 # 시스템 프롬프트: 상담사 역할
 system_prompt = """
@@ -20,30 +19,89 @@ system_prompt = """
 이모티콘은 최대한 사용하지 말아줘.
 """
 
-# 대화 기록 초기화
-chat_history: list[ChatCompletionMessageParam] = [
-    {"role": "system", "content": system_prompt}
-]
-
-def generate_response(user_input: str) -> str:
-    # 1) 유저 메시지를 히스토리에 추가
-    chat_history.append({"role": "user", "content": user_input})
-
-    # 2) 토큰 폭주 방지: 시스템 + 최근 10턴만 남기기
-    MAX_TURNS = 10
-    system = chat_history[0]
-    history = chat_history[1:]
-    trimmed = history[-MAX_TURNS*2:]   # user+assistant 합쳐 2개 per turn
-    prompt_messages = [system] + trimmed
-
-    # 3) OpenAI API 호출 (trimmed 히스토리만 전달)
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=prompt_messages,
-    )
-
-    # 4) 모델 답변을 히스토리에 추가
-    reply = response.choices[0].message.content
-    chat_history.append({"role": "assistant", "content": reply})
-
-    return reply
\ No newline at end of file
+# 요약 모드: 오래된 턴은 대화 요약 하나로 접고, 요약 + 최근 턴만 보냄
+#   요약되지 않은 턴이 CHAT_SUMMARY_EVERY + CHAT_SUMMARY_KEEP_TURNS 개가 되면
+#   최근 CHAT_SUMMARY_KEEP_TURNS 턴만 남기고 나머지를 백그라운드에서 요약에 합침
+CHAT_SUMMARY = os.getenv("WEAKEND_CHAT_SUMMARY", "0") == "1"
+CHAT_SUMMARY_EVERY = int(os.getenv("WEAKEND_CHAT_SUMMARY_EVERY", "6"))
+CHAT_SUMMARY_KEEP_TURNS = int(os.getenv("WEAKEND_CHAT_SUMMARY_KEEP_TURNS", "3"))
+
+summary_prompt = """
+다음은 감성 챗봇과 사용자의 대화야. 기존 요약과 새 대화를 합쳐 하나의 요약으로 다시 써줘.
+사용자가 털어놓은 상황, 감정, 중요한 사람·사건 위주로 5문장 이내로 짧게 써줘.
+"""
+
+
+def build_prompt(session_id: str, user_input: str, summarize: bool = False) -> list[ChatCompletionMessageParam]:
+    """시스템 프롬프트 + (요약 모드면 대화 요약) + 토큰 예산 안의 최근 대화 + 이번 메시지"""
+    conv = conversations.get(session_id)
+    messages = [{"role": "system", "content": system_prompt}]
+    if summarize:
+        with conv.lock:
+            summary, since = conv.summary, conv.summary_upto
+        if summary:
+            messages.append({"role": "system", "content": f"지금까지의 대화 요약:\n{summary}"})
+        history = conv.recent(since_seq=since)
+    else:
+        history = conv.recent()
+    return messages + history + [{"role": "user", "content": user_input}]
+
+
+def _refresh_summary(session_id: str) -> None:
+    """요약할 턴이 충분히 쌓였으면 백그라운드에서 요약을 갱신 (이번 답변은 기다리지 않음)"""
+    conv = conversations.get(session_id)
+    job = conv.start_summary(CHAT_SUMMARY_EVERY, CHAT_SUMMARY_KEEP_TURNS)
+    if job is None:
+        return
+    old_summary, folded, upto = job
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in folded)
+    request = [
+        {"role": "system", "content": summary_prompt},
+        {"role": "user", "content": f"기존 요약:\n{old_summary or '(없음)'}\n\n새 대화:\n{transcript}"},
+    ]
+
+    def done(future):
+        if future.exception() is not None:
+            print(f"[Warning] conversation summary failed: {future.exception()}")
+            conv.finish_summary(None, upto)
+        else:
+            conv.finish_summary(future.result(), upto)
+
+    llm.submit(request).add_done_callback(done)
+
+
+def generate_response(user_input: str, session_id: str, summarize: bool = CHAT_SUMMARY) -> str:
+    # 1) 세션별 대화 기록으로 프롬프트 구성 (토큰 예산만큼만)
+    prompt_messages = build_prompt(session_id, user_input, summarize)
+
+    # 2) OpenAI API 호출 (공용 비동기 클라이언트: deadline·재시도·동시성 제한)
+    reply = llm.complete_sync(prompt_messages)
+
+    # 3) 답변을 받은 뒤에 user/assistant 한 턴으로 기록 (실패한 요청은 남기지 않음)
+    conversations.get(session_id).add_turn(user_input, reply)
+    if summarize:
+        _refresh_summary(session_id)
+
+    return reply
+
+
+def generate_response_stream(user_input: str, session_id: str, summarize: bool = CHAT_SUMMARY) -> Iterator[str]:
+    """
+    generate_response 의 스트리밍 버전: 토큰(조각)이 도착하는 대로 yield 하고,
+    스트림이 끝나면 전체 답변을 대화 기록에 남깁니다.
+    """
+    prompt_messages = build_prompt(session_id, user_input, summarize)
+
+    parts = []
+    for delta in llm.stream_sync(prompt_messages):
+        parts.append(delta)
+        yield delta
+
+    conversations.get(session_id).add_turn(user_input, "".join(parts))
+    if summarize:
+        _refresh_summary(session_id)
+
+
+def end_session(session_id: str) -> None:
+    """로그아웃 등으로 세션이 끝나면 대화 기록 제거"""
+    conversations.end(session_id)
@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+
+# 세션별 대화 기록 (프로세스 공용)
+#   - 세션마다 최근 CHAT_MAX_MESSAGES 개만 보관하는 ring buffer
+#   - 프롬프트에는 대략 CHAT_TOKEN_BUDGET 토큰 안에 들어가는 최근 메시지만 넣음
+#   - CHAT_IDLE_SEC 동안 쓰지 않은 세션, CHAT_MAX_SESSIONS 를 넘는 오래된 세션은 제거
+CHAT_MAX_MESSAGES = int(os.getenv("WEAKEND_CHAT_MAX_MESSAGES", "40"))
+CHAT_TOKEN_BUDGET = int(os.getenv("WEAKEND_CHAT_TOKEN_BUDGET", "1500"))
+CHAT_IDLE_SEC = float(os.getenv("WEAKEND_CHAT_IDLE_SEC", "1800"))
+CHAT_MAX_SESSIONS = int(os.getenv("WEAKEND_CHAT_MAX_SESSIONS", "10000"))
+
+MESSAGE_OVERHEAD_TOKENS = 4   # role 등 메시지마다 붙는 토큰
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    대략적인 토큰 수. 한글은 음절(UTF-8 3바이트)당 1토큰 안팎, 영어는 4글자당 1토큰 정도라
+    UTF-8 바이트 수 / 3 으로 어림합니다 (토크나이저 없이 예산을 넘지 않는 쪽으로).
+    """
+    return len(text.encode("utf-8")) // 3 + MESSAGE_OVERHEAD_TOKENS
+
+
+class Conversation:
+    def __init__(self, max_messages: int = CHAT_MAX_MESSAGES):
+        self.messages = deque(maxlen=max_messages)   # [(seq, role, content, tokens)]
+        self.next_seq = 0
+        self.summary = ""          # 요약 모드: seq < summary_upto 인 메시지를 요약한 내용
+        self.summary_upto = 0
+        self.summarizing = False
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add_turn(self, user_input: str, reply: str) -> None:
+        with self.lock:
+            for role, content in (("user", user_input), ("assistant", reply)):
+                self.messages.append((self.next_seq, role, content, estimate_tokens(content)))
+                self.next_seq += 1
+
+    def recent(self, token_budget: int = CHAT_TOKEN_BUDGET, since_seq: int = 0) -> list:
+        """since_seq 이후 메시지 중 token_budget 안에 들어가는 최근 것 (user 메시지부터 시작하도록 자름)"""
+        with self.lock:
+            picked, used = [], 0
+            for seq, role, content, tokens in reversed(self.messages):
+                if seq < since_seq or used + tokens > token_budget:
+                    break
+                picked.append((role, content))
+                used += tokens
+        picked.reverse()
+        while picked and picked[0][0] != "user":
+            picked.pop(0)
+        return [{"role": role, "content": content} for role, content in picked]
+
+    # ── 요약 모드 ─────────────────────────────────────────────────────────
+    def start_summary(self, every_turns: int, keep_turns: int):
+        """
+        요약되지 않은 턴이 every_turns + keep_turns 개 이상이면, 최근 keep_turns 턴을 뺀 나머지를
+        요약할 작업 (기존 요약, 요약할 메시지, 요약 후 summary_upto)을 반환. 아니면 None
+        """
+        with self.lock:
+            if self.summarizing:
+                return None
+            pending = [m for m in self.messages if m[0] >= self.summary_upto]
+            user_idx = [i for i, m in enumerate(pending) if m[1] == "user"]
+            if len(user_idx) < every_turns + keep_turns:
+                return None
+            cut = user_idx[-keep_turns] if keep_turns > 0 else len(pending)
+            upto = pending[cut][0] if cut < len(pending) else self.next_seq
+            self.summarizing = True
+            return self.summary, [{"role": role, "content": content} for _, role, content, _ in pending[:cut]], upto
+
+    def finish_summary(self, summary: str | None, upto: int) -> None:
+        with self.lock:
+            self.summarizing = False
+            if summary:
+                self.summary, self.summary_upto = summary, upto
+
+
+class ConversationStore:
+    def __init__(self, max_sessions: int = CHAT_MAX_SESSIONS, idle_sec: float = CHAT_IDLE_SEC):
+        self.max_sessions = max_sessions
+        self.idle_sec = idle_sec
+        self._sessions: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Conversation:
+        now = time.monotonic()
+        with self._lock:
+            conv = self._sessions.get(session_id)
+            if conv is None:
+                conv = self._sessions[session_id] = Conversation()
+            self._sessions.move_to_end(session_id)
+            conv.last_used = now
+            # 새 세션을 넣은 뒤에 정리해야 max_sessions 를 넘지 않음 (방금 쓴 세션은 맨 뒤라 남음)
+            self._evict(now, keep=session_id)
+            return conv
+
+    def _evict(self, now: float, keep: str) -> None:
+        # 가장 오래 쓰지 않은 세션부터 정렬되어 있으므로 앞에서부터만 확인
+        while self._sessions:
+            session_id, conv = next(iter(self._sessions.items()))
+            if session_id == keep:
+                break
+            if len(self._sessions) <= self.max_sessions and now - conv.last_used < self.idle_sec:
+                break
+            del self._sessions[session_id]
+
+    def end(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+conversations = ConversationStore()
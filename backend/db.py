@@ -1,25 +1,57 @@
 import os
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from supabase import create_client
-from dotenv import load_dotenv
 import streamlit as st
+from backend.storage import storage
+from utils.tracing import trace
 
 
-load_dotenv()
+# login_id → userid 캐시 (프로세스 공용, TTL + 최대 개수 제한)
+USERID_CACHE_TTL = float(os.getenv("WEAKEND_USERID_CACHE_TTL", "600"))
+USERID_CACHE_SIZE = int(os.getenv("WEAKEND_USERID_CACHE_SIZE", "10000"))
 
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-supabase = create_client(url, key)
+_userid_cache: "OrderedDict[str, tuple[int, float]]" = OrderedDict()  # login_id → (userid, 만료 시각)
+_userid_cache_lock = threading.Lock()
+
+
+def remember_userid(login_id: str, userid: int) -> None:
+    """로그인 등으로 이미 알게 된 userid 를 캐시에 넣음"""
+    if USERID_CACHE_SIZE <= 0:
+        return
+    with _userid_cache_lock:
+        _userid_cache[login_id] = (userid, time.monotonic() + USERID_CACHE_TTL)
+        _userid_cache.move_to_end(login_id)
+        while len(_userid_cache) > USERID_CACHE_SIZE:
+            _userid_cache.popitem(last=False)
+
+
+def invalidate_userid(login_id: str | None = None) -> None:
+    """계정 정보가 바뀌면 호출. login_id 를 생략하면 전체 비움"""
+    with _userid_cache_lock:
+        if login_id is None:
+            _userid_cache.clear()
+        else:
+            _userid_cache.pop(login_id, None)
 
 
 def get_userid_by_login(login_id: str) -> int | None:
-    """login_id로 users.userid를 조회"""
-    res = supabase.table("users") \
-        .select("userid") \
-        .eq("login_id", login_id) \
-        .single() \
-        .execute()
-    return (res.data or {}).get("userid")
+    """login_id로 users.userid를 조회 (캐시에 있으면 DB 조회 생략)"""
+    with _userid_cache_lock:
+        hit = _userid_cache.get(login_id)
+        if hit is not None:
+            if hit[1] > time.monotonic():
+                _userid_cache.move_to_end(login_id)
+                return hit[0]
+            del _userid_cache[login_id]
+
+    with trace("db.users.select_userid"):
+        userid = storage.get_userid(login_id)
+    # 없는 아이디는 캐시하지 않음 (방금 가입한 계정이 막히지 않도록)
+    if userid is not None:
+        remember_userid(login_id, userid)
+    return userid
 
 
 # DB에 대화 내용 저장
@@ -28,19 +60,20 @@ def save_message(login_id: str, role: str, message: str) -> None:
     user_id = get_userid_by_login(login_id)
     if user_id is None:
         raise ValueError(f"Unknown login_id: {login_id}")
-    supabase.table("chat_log").insert({
-        "userid":       user_id,
-        "chat_time":    datetime.now().isoformat(),
-        "chat_content": message,
-        "chat_role":    role
-    }).execute()
+    with trace("db.chat_log.insert"):
+        storage.insert_chat_logs([{
+            "userid":       user_id,
+            "chat_time":    datetime.now().isoformat(),
+            "chat_content": message,
+            "chat_role":    role
+        }])
 
 
 # 지역 정보 등록
 def get_region_list():
     try:
-        response = supabase.table("region").select("region_id, region_name").execute()
-        region_data = response.data or []
+        with trace("db.region.select"):
+            region_data = storage.list_regions()
         return [(r["region_name"], r["region_id"]) for r in region_data]  # [(이름, id)] 튜플 리스트
     except Exception as e:
         st.error(f"지역 정보를 불러오지 못했습니다: {e}")
@@ -0,0 +1,235 @@
+"""
+비동기 LLM 클라이언트
+
+Streamlit 스크립트 스레드가 느린 upstream 에 묶이지 않도록 OpenAI 호출을
+백그라운드 이벤트 루프 하나에서 처리합니다.
+
+  - 공용 커넥션 풀 (WEAKEND_LLM_MAX_CONNECTIONS)
+  - 동시 요청 수 제한 (WEAKEND_LLM_MAX_CONCURRENCY)
+  - 호출 단위 deadline (WEAKEND_LLM_DEADLINE 초, 재시도 포함 전체 시간)
+  - 일시적 오류(타임아웃·연결·429·5xx)는 지수 백오프 + full jitter 로 최대 WEAKEND_LLM_MAX_RETRIES 번 재시도
+  - hedged request: WEAKEND_LLM_HEDGE_AFTER 초 안에 응답이 없으면 같은 요청을 하나 더 보내 먼저 온 쪽 사용 (0 이면 끔)
+
+WEAKEND_LLM_BASE_URL 로 OpenAI 호환 서버(예: benchmarks/mock_openai_server.py)를 가리킬 수 있습니다.
+"""
+import os
+import asyncio
+import concurrent.futures
+import queue
+import random
+import threading
+import time
+from typing import AsyncIterator, Iterator, List, Optional
+
+import httpx
+import openai
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from utils.tracing import observe, trace
+
+load_dotenv()
+
+LLM_MODEL = os.getenv("WEAKEND_LLM_MODEL", "gpt-3.5-turbo")
+LLM_BASE_URL = os.getenv("WEAKEND_LLM_BASE_URL") or None
+LLM_MAX_CONNECTIONS = int(os.getenv("WEAKEND_LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_CONCURRENCY = int(os.getenv("WEAKEND_LLM_MAX_CONCURRENCY", "16"))
+LLM_DEADLINE = float(os.getenv("WEAKEND_LLM_DEADLINE", "30"))
+LLM_MAX_RETRIES = int(os.getenv("WEAKEND_LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("WEAKEND_LLM_RETRY_BACKOFF", "0.5"))
+LLM_HEDGE_AFTER = float(os.getenv("WEAKEND_LLM_HEDGE_AFTER", "0"))
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    pass
+
+
+class LLMClient:
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = LLM_BASE_URL,
+                 model: str = LLM_MODEL, max_connections: int = LLM_MAX_CONNECTIONS,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, deadline: float = LLM_DEADLINE,
+                 max_retries: int = LLM_MAX_RETRIES, hedge_after: float = LLM_HEDGE_AFTER):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url
+        self.model = model
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after
+        self.hedges = 0
+        self.retries = 0
+        self._client: Optional[AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock = threading.Lock()
+
+    # ── 이벤트 루프 ───────────────────────────────────────────────────────
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="llm-client", daemon=True)
+                    thread.start()
+                    try:
+                        # 클라이언트·세마포어는 루프 스레드 안에서 만들어 그 루프에 묶이도록
+                        asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+                    except BaseException:
+                        # 설정에 실패하면 루프 스레드를 남기지 않고, 다음 호출에서 다시 시도
+                        loop.call_soon_threadsafe(loop.stop)
+                        thread.join()
+                        loop.close()
+                        raise
+                    self._loop = loop
+        return self._loop
+
+    async def _setup(self) -> None:
+        http_client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=self.max_connections, max_keepalive_connections=self.max_connections))
+        # 재시도·타임아웃은 여기서 직접 관리
+        self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                   max_retries=0, http_client=http_client)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter: [0, base * 2^attempt)
+        return random.uniform(0, LLM_RETRY_BACKOFF * (2 ** attempt))
+
+    # ── 비동기 API ────────────────────────────────────────────────────────
+    async def _attempt(self, messages: List[dict], timeout: float) -> str:
+        async with self._semaphore:
+            response = await self._client.chat.completions.create(
+                model=self.model, messages=messages, timeout=timeout)
+        return response.choices[0].message.content
+
+    async def _hedged(self, messages: List[dict], timeout: float) -> str:
+        """hedge_after 초가 지나도 응답이 없으면 두 번째 요청을 보내고 먼저 성공한 쪽을 사용"""
+        primary = asyncio.ensure_future(self._attempt(messages, timeout))
+        pending = {primary}
+        try:
+            if self.hedge_after <= 0 or self.hedge_after >= timeout:
+                return await primary
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+            if done or self._semaphore.locked():     # 이미 끝났거나 여유가 없으면 hedge 하지 않음
+                return await primary
+            self.hedges += 1
+            pending.add(asyncio.ensure_future(self._attempt(messages, timeout - self.hedge_after)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # 진 쪽 요청, 또는 deadline 으로 취소된 경우 남은 요청 정리
+            for task in pending:
+                task.cancel()
+
+    async def complete(self, messages: List[dict], deadline: Optional[float] = None) -> str:
+        """deadline 초 안에 (재시도 포함) 답변 전체를 반환"""
+        end = time.monotonic() + (deadline or self.deadline)
+        for attempt in range(self.max_retries + 1):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                return await asyncio.wait_for(self._hedged(messages, remaining), remaining)
+            except (asyncio.TimeoutError, *RETRYABLE_ERRORS) as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                print(f"[Warning] LLM request failed ({type(e).__name__}), retrying")
+                await asyncio.sleep(min(self._backoff(attempt), max(0.0, end - time.monotonic())))
+        raise LLMDeadlineExceeded(f"LLM request exceeded {deadline or self.deadline}s deadline")
+
+    async def stream(self, messages: List[dict], deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        답변 조각을 도착하는 대로 yield. 첫 조각이 오기 전까지만 재시도하고
+        (이미 보낸 조각이 중복되지 않도록), deadline 은 스트림 전체에 적용합니다.
+        """
+        end = time.monotonic() + (deadline or self.deadline)
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self._semaphore:
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    stream = await asyncio.wait_for(self._client.chat.completions.create(
+                        model=self.model, messages=messages, stream=True, timeout=remaining), remaining)
+                    try:
+                        async for chunk in stream:
+                            if time.monotonic() > end:
+                                raise LLMDeadlineExceeded(f"LLM stream exceeded {deadline or self.deadline}s deadline")
+                            if not chunk.choices or not chunk.choices[0].delta.content:
+                                continue
+                            started = True
+                            yield chunk.choices[0].delta.content
+                    finally:
+                        await stream.close()
+                return
+            except (asyncio.TimeoutError, *RETRYABLE_ERRORS) as e:
+                if started or attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                print(f"[Warning] LLM stream failed ({type(e).__name__}), retrying")
+                await asyncio.sleep(min(self._backoff(attempt), max(0.0, end - time.monotonic())))
+        raise LLMDeadlineExceeded(f"LLM stream exceeded {deadline or self.deadline}s deadline")
+
+    # ── 동기 래퍼 (Streamlit 스레드용) ────────────────────────────────────
+    def complete_sync(self, messages: List[dict], deadline: Optional[float] = None) -> str:
+        loop = self._ensure_loop()
+        with trace("llm.chat_completion"):
+            return asyncio.run_coroutine_threadsafe(self.complete(messages, deadline), loop).result()
+
+    def submit(self, messages: List[dict], deadline: Optional[float] = None) -> "concurrent.futures.Future":
+        """기다리지 않고 요청만 보냄 (백그라운드 작업용)"""
+        return asyncio.run_coroutine_threadsafe(self.complete(messages, deadline), self._ensure_loop())
+
+    def stream_sync(self, messages: List[dict], deadline: Optional[float] = None) -> Iterator[str]:
+        loop = self._ensure_loop()
+        chunks: "queue.Queue" = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for delta in self.stream(messages, deadline):
+                    chunks.put(delta)
+                chunks.put(done)
+            except BaseException as e:
+                chunks.put(e)
+
+        start = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        first = True
+        try:
+            with trace("llm.chat_completion_stream"):
+                while True:
+                    item = chunks.get()
+                    if item is done:
+                        return
+                    if isinstance(item, BaseException):
+                        raise item
+                    if first:
+                        # 사용자가 실제로 체감하는 지연 (첫 토큰까지)
+                        observe("llm.first_token", time.perf_counter() - start)
+                        first = False
+                    yield item
+        finally:
+            future.cancel()    # 소비자가 중간에 멈추면 upstream 스트림도 닫음
+
+    def stats(self) -> dict:
+        return {"retries": self.retries, "hedges": self.hedges}
+
+
+llm = LLMClient()
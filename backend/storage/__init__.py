@@ -0,0 +1,45 @@
+"""
+저장소 선택
+
+    WEAKEND_STORAGE=supabase            (기본) Supabase 원격 DB
+    WEAKEND_STORAGE=sqlite              로컬 SQLite 파일 (WEAKEND_SQLITE_PATH, 기본 weakend.sqlite3)
+"""
+import os
+import threading
+
+from backend.storage.base import Storage
+
+STORAGE_BACKEND = os.getenv("WEAKEND_STORAGE", "supabase")
+SQLITE_PATH = os.getenv("WEAKEND_SQLITE_PATH", "weakend.sqlite3")
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> Storage:
+    if backend == "supabase":
+        from backend.storage.supabase_storage import SupabaseStorage
+        return SupabaseStorage()
+    if backend == "sqlite":
+        from backend.storage.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(SQLITE_PATH)
+    raise ValueError(f"Unknown WEAKEND_STORAGE: {backend} (expected 'supabase' or 'sqlite')")
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    """프로세스 공용 저장소 (처음 쓸 때 생성)"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def __getattr__(name):
+    # `from backend.storage import storage` 를 처음 쓸 때까지 연결을 미룸
+    # (sqlite_storage CLI 처럼 패키지만 import 하는 경우 Supabase 에 연결하지 않도록)
+    if name == "storage":
+        return get_storage()
+    raise AttributeError(name)
@@ -0,0 +1,69 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+
+class Storage(ABC):
+    """
+    users / region / chat_log / emotions / middle_categories 에 대한 저장소 인터페이스.
+    구현: SupabaseStorage(원격), SQLiteStorage(로컬 파일, 단일 노드·벤치마크용)
+    """
+
+    # ── users ─────────────────────────────────────────────────────────────
+    @abstractmethod
+    def get_user_credentials(self, login_id: str) -> Optional[dict]:
+        """{"userid", "password"} 또는 없으면 None"""
+
+    @abstractmethod
+    def get_userid(self, login_id: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def login_id_exists(self, login_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def phonenumber_exists(self, phonenumber: str) -> bool:
+        ...
+
+    @abstractmethod
+    def insert_user(self, user: dict) -> None:
+        ...
+
+    @abstractmethod
+    def update_last_activity(self, login_id: str, last_activity: str) -> None:
+        ...
+
+    # ── region ────────────────────────────────────────────────────────────
+    @abstractmethod
+    def list_regions(self) -> List[dict]:
+        """[{"region_id", "region_name"}]"""
+
+    # ── chat_log / emotions ───────────────────────────────────────────────
+    @abstractmethod
+    def insert_chat_logs(self, rows: List[dict]) -> List[int]:
+        """여러 행을 한 트랜잭션으로 저장하고, 보낸 순서대로 생성된 chat_id 를 반환 (실패하면 한 행도 남기지 않음)"""
+
+    @abstractmethod
+    def insert_emotions(self, rows: List[dict]) -> None:
+        ...
+
+    @abstractmethod
+    def emotion_page(self, userid: int, after_emotion_id: int, limit: int) -> List[dict]:
+        """
+        userid 의 emotions 중 emotion_id > after_emotion_id 인 행을 emotion_id 순으로 최대 limit 개.
+        [{"emotion_id", "analysis_date", "emotion_score", "middle_category_id"}]
+        """
+
+    # ── middle_categories ─────────────────────────────────────────────────
+    @abstractmethod
+    def list_middle_categories(self) -> List[dict]:
+        """[{"middle_category_id", "middle_categoryname", "main_category_id"}]"""
+
+    # ── 오류 분류 ─────────────────────────────────────────────────────────
+    def is_permanent_error(self, error: Exception) -> bool:
+        """
+        다시 보내도 같은 결과인 오류(제약 조건 위반, 잘못된 값 등)인지.
+        write-behind 큐는 이런 오류를 재시도하지 않고, 묶음 insert 에서는 문제 행만 골라 버립니다.
+        """
+        # 행 dict 에 컬럼이 없거나 값의 타입이 맞지 않는 경우
+        return isinstance(error, (KeyError, TypeError, ValueError))
@@ -0,0 +1,182 @@
+"""
+로컬 SQLite 저장소 (단일 노드 배포 · 오프라인 벤치마크용)
+
+WAL 모드로 열어 읽기와 쓰기가 서로 막지 않고, 스레드마다 연결을 따로 둡니다.
+리포트·로그 조회에 쓰는 userid / chat_id / analysis_date 에 인덱스를 둡니다.
+
+    # 스키마 만들기 + 지역/감정 카테고리 채우기 (JSON: [{...}, ...])
+    python -m backend.storage.sqlite_storage init weakend.sqlite3 \\
+        --regions regions.json --categories middle_categories.json
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+from typing import List, Optional
+
+from backend.storage.base import Storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS region (
+    region_id   INTEGER PRIMARY KEY,
+    region_name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    userid        INTEGER PRIMARY KEY AUTOINCREMENT,
+    login_id      TEXT NOT NULL UNIQUE,
+    password      TEXT NOT NULL,
+    birthdate     TEXT,
+    region_id     INTEGER REFERENCES region(region_id),
+    phonenumber   TEXT,
+    gender        TEXT,
+    last_activity TEXT,
+    signup_date   TEXT,
+    role          TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_phonenumber ON users(phonenumber);
+CREATE TABLE IF NOT EXISTS chat_log (
+    chat_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    userid       INTEGER NOT NULL REFERENCES users(userid),
+    chat_time    TEXT NOT NULL,
+    chat_content TEXT NOT NULL,
+    chat_role    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_log_userid ON chat_log(userid, chat_id);
+CREATE TABLE IF NOT EXISTS middle_categories (
+    middle_category_id  INTEGER PRIMARY KEY,
+    middle_categoryname TEXT NOT NULL UNIQUE,
+    main_category_id    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS emotions (
+    emotion_id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id            INTEGER NOT NULL REFERENCES chat_log(chat_id),
+    main_category_id   INTEGER NOT NULL,
+    middle_category_id INTEGER NOT NULL REFERENCES middle_categories(middle_category_id),
+    emotion_score      REAL NOT NULL,
+    analysis_date      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_emotions_chat_id ON emotions(chat_id);
+CREATE INDEX IF NOT EXISTS idx_emotions_analysis_date ON emotions(analysis_date);
+"""
+
+_USER_COLUMNS = ("login_id", "password", "birthdate", "region_id", "phonenumber",
+                 "gender", "last_activity", "signup_date", "role")
+_CHAT_COLUMNS = ("userid", "chat_time", "chat_content", "chat_role")
+_EMOTION_COLUMNS = ("chat_id", "main_category_id", "middle_category_id", "emotion_score", "analysis_date")
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _all(self, sql: str, params=()) -> List[dict]:
+        return [dict(row) for row in self._conn().execute(sql, params).fetchall()]
+
+    # ── users ─────────────────────────────────────────────────────────────
+    def get_user_credentials(self, login_id: str) -> Optional[dict]:
+        rows = self._all("SELECT userid, password FROM users WHERE login_id = ?", (login_id,))
+        return rows[0] if rows else None
+
+    def get_userid(self, login_id: str) -> Optional[int]:
+        row = self._conn().execute("SELECT userid FROM users WHERE login_id = ?", (login_id,)).fetchone()
+        return row["userid"] if row else None
+
+    def login_id_exists(self, login_id: str) -> bool:
+        return self._conn().execute("SELECT 1 FROM users WHERE login_id = ?", (login_id,)).fetchone() is not None
+
+    def phonenumber_exists(self, phonenumber: str) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM users WHERE phonenumber = ?", (phonenumber,)).fetchone() is not None
+
+    def insert_user(self, user: dict) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                f"INSERT INTO users ({', '.join(_USER_COLUMNS)}) VALUES ({', '.join('?' * len(_USER_COLUMNS))})",
+                tuple(user.get(c) for c in _USER_COLUMNS),
+            )
+
+    def update_last_activity(self, login_id: str, last_activity: str) -> None:
+        with self._conn() as conn:
+            conn.execute("UPDATE users SET last_activity = ? WHERE login_id = ?", (last_activity, login_id))
+
+    # ── region ────────────────────────────────────────────────────────────
+    def list_regions(self) -> List[dict]:
+        return self._all("SELECT region_id, region_name FROM region ORDER BY region_id")
+
+    # ── chat_log / emotions ───────────────────────────────────────────────
+    def insert_chat_logs(self, rows: List[dict]) -> List[int]:
+        sql = f"INSERT INTO chat_log ({', '.join(_CHAT_COLUMNS)}) VALUES (?, ?, ?, ?)"
+        with self._conn() as conn:    # 한 트랜잭션
+            return [conn.execute(sql, tuple(r[c] for c in _CHAT_COLUMNS)).lastrowid for r in rows]
+
+    def insert_emotions(self, rows: List[dict]) -> None:
+        sql = f"INSERT INTO emotions ({', '.join(_EMOTION_COLUMNS)}) VALUES (?, ?, ?, ?, ?)"
+        with self._conn() as conn:
+            conn.executemany(sql, [tuple(r[c] for c in _EMOTION_COLUMNS) for r in rows])
+
+    def emotion_page(self, userid: int, after_emotion_id: int, limit: int) -> List[dict]:
+        return self._all(
+            "SELECT e.emotion_id, e.analysis_date, e.emotion_score, e.middle_category_id "
+            "FROM emotions e JOIN chat_log c ON c.chat_id = e.chat_id "
+            "WHERE c.userid = ? AND e.emotion_id > ? "
+            "ORDER BY e.emotion_id LIMIT ?",
+            (userid, after_emotion_id, limit),
+        )
+
+    # ── middle_categories ─────────────────────────────────────────────────
+    def list_middle_categories(self) -> List[dict]:
+        return self._all("SELECT middle_category_id, middle_categoryname, main_category_id FROM middle_categories")
+
+    # ── 오류 분류 ─────────────────────────────────────────────────────────
+    def is_permanent_error(self, error: Exception) -> bool:
+        # NOT NULL·UNIQUE 위반, 바인딩할 수 없는 값 (database is locked 같은 OperationalError 는 재시도)
+        return isinstance(error, (sqlite3.IntegrityError, sqlite3.DataError, sqlite3.InterfaceError)) \
+            or super().is_permanent_error(error)
+
+    # ── 초기 데이터 ───────────────────────────────────────────────────────
+    def seed(self, regions: List[dict] = (), categories: List[dict] = ()) -> None:
+        with self._conn() as conn:
+            conn.executemany("INSERT OR REPLACE INTO region (region_id, region_name) VALUES (?, ?)",
+                             [(r["region_id"], r["region_name"]) for r in regions])
+            conn.executemany(
+                "INSERT OR REPLACE INTO middle_categories "
+                "(middle_category_id, middle_categoryname, main_category_id) VALUES (?, ?, ?)",
+                [(c["middle_category_id"], c["middle_categoryname"], c["main_category_id"]) for c in categories],
+            )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="로컬 SQLite 저장소 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    init = sub.add_parser("init", help="스키마 생성 후 지역/감정 카테고리 채우기")
+    init.add_argument("path")
+    init.add_argument("--regions", help="[{region_id, region_name}] JSON 파일")
+    init.add_argument("--categories", help="[{middle_category_id, middle_categoryname, main_category_id}] JSON 파일")
+    args = parser.parse_args(argv)
+
+    def read(path):
+        if not path:
+            return []
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    SQLiteStorage(args.path).seed(read(args.regions), read(args.categories))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
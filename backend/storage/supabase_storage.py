@@ -0,0 +1,78 @@
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+from backend.storage.base import Storage
+
+
+class SupabaseStorage(Storage):
+    """Supabase(PostgREST) 원격 저장소"""
+
+    def __init__(self, client=None):
+        if client is None:
+            load_dotenv()
+            client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        self.client = client
+
+    # ── users ─────────────────────────────────────────────────────────────
+    def get_user_credentials(self, login_id: str) -> Optional[dict]:
+        rows = self.client.table("users").select("userid, password").eq("login_id", login_id).execute().data
+        return rows[0] if rows else None
+
+    def get_userid(self, login_id: str) -> Optional[int]:
+        rows = self.client.table("users").select("userid").eq("login_id", login_id).limit(1).execute().data
+        return rows[0]["userid"] if rows else None
+
+    def login_id_exists(self, login_id: str) -> bool:
+        return bool(self.client.table("users").select("login_id").eq("login_id", login_id).execute().data)
+
+    def phonenumber_exists(self, phonenumber: str) -> bool:
+        return bool(self.client.table("users").select("phonenumber").eq("phonenumber", phonenumber).execute().data)
+
+    def insert_user(self, user: dict) -> None:
+        self.client.table("users").insert(user).execute()
+
+    def update_last_activity(self, login_id: str, last_activity: str) -> None:
+        self.client.table("users").update({"last_activity": last_activity}).eq("login_id", login_id).execute()
+
+    # ── region ────────────────────────────────────────────────────────────
+    def list_regions(self) -> List[dict]:
+        return self.client.table("region").select("region_id, region_name").execute().data or []
+
+    # ── chat_log / emotions ───────────────────────────────────────────────
+    def insert_chat_logs(self, rows: List[dict]) -> List[int]:
+        # 한 번의 POST 는 INSERT ... RETURNING 하나로 실행되어, representation 이 보낸 순서대로 돌아오는 것에 의존해
+        # chat_id 를 행에 짝지음. 개수가 다르면 짝을 잘못 지을 수 있으므로 쓰지 않고 오류로 처리
+        data = self.client.table("chat_log").insert(rows).execute().data or []
+        if len(data) != len(rows):
+            raise RuntimeError(f"chat_log insert returned {len(data)} rows for {len(rows)} inserted")
+        return [row["chat_id"] for row in data]
+
+    def insert_emotions(self, rows: List[dict]) -> None:
+        self.client.table("emotions").insert(rows).execute()
+
+    def is_permanent_error(self, error: Exception) -> bool:
+        # PostgREST APIError 의 code 는 Postgres SQLSTATE: 22xxx 잘못된 값, 23xxx 제약 조건 위반
+        code = str(getattr(error, "code", "") or "")
+        return code[:2] in ("22", "23") or super().is_permanent_error(error)
+
+    def emotion_page(self, userid: int, after_emotion_id: int, limit: int) -> List[dict]:
+        # chat_log 를 inner join 으로 함께 묻고 chat_log.userid 로 걸러 한 번의 요청으로 처리
+        rows = self.client.table("emotions") \
+            .select("emotion_id, analysis_date, emotion_score, middle_category_id, chat_log!inner(userid)") \
+            .eq("chat_log.userid", userid) \
+            .gt("emotion_id", after_emotion_id) \
+            .order("emotion_id") \
+            .limit(limit) \
+            .execute().data or []
+        for row in rows:
+            row.pop("chat_log", None)
+        return rows
+
+    # ── middle_categories ─────────────────────────────────────────────────
+    def list_middle_categories(self) -> List[dict]:
+        return self.client.table("middle_categories") \
+            .select("middle_category_id, middle_categoryname, main_category_id") \
+            .execute().data or []
@@ -0,0 +1,68 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator
+
+from backend.chatbot import generate_response, generate_response_stream
+from backend.log_emotions import log_emotion
+from utils.tracing import trace
+
+# 감정 분석·저장을 답변 생성과 동시에 돌리는 워커 수 (프로세스 공용)
+TURN_WORKERS = int(os.getenv("WEAKEND_TURN_WORKERS", "4"))
+
+_executor = ThreadPoolExecutor(max_workers=TURN_WORKERS, thread_name_prefix="chat-turn")
+
+
+def _report_failure(stage: str):
+    def callback(future: Future) -> None:
+        if future.exception() is not None:
+            print(f"[Warning] {stage} failed: {future.exception()}")
+    return callback
+
+
+def _log_user(login_id: str, message: str, audio, chat_time: str) -> None:
+    with trace("chat_turn.analysis"):
+        log_emotion(login_id, "user", message, audio=audio, chat_time=chat_time)
+
+
+def _log_bot(user_future: Future, login_id: str, reply: str, chat_time: str) -> None:
+    # user 기록이 먼저 큐에 들어가도록 기다림 (실패해도 bot 기록은 남김)
+    try:
+        user_future.result()
+    except Exception:
+        pass
+    log_emotion(login_id, "bot", reply, chat_time=chat_time)
+
+
+def run_chat_turn(login_id: str, user_input: str, audio=None, session_id: str | None = None) -> str:
+    """
+    대화 한 턴: 사용자 메시지 감정 분석·저장과 LLM 답변 생성을 동시에 시작하고,
+    답변이 나오는 대로 반환합니다. 분석·저장은 백그라운드에서 마저 끝납니다.
+    """
+    user_time = datetime.now().isoformat()
+    user_future = _executor.submit(_log_user, login_id, user_input, audio, user_time)
+    user_future.add_done_callback(_report_failure("user message analysis"))
+
+    reply = generate_response(user_input, session_id or login_id)
+
+    bot_future = _executor.submit(_log_bot, user_future, login_id, reply, datetime.now().isoformat())
+    bot_future.add_done_callback(_report_failure("bot message logging"))
+    return reply
+
+
+def stream_chat_turn(login_id: str, user_input: str, audio=None, session_id: str | None = None) -> Iterator[str]:
+    """
+    run_chat_turn 의 스트리밍 버전: 답변 조각을 도착하는 대로 yield 하고,
+    스트림이 끝나면 완성된 답변을 bot 메시지로 기록합니다.
+    """
+    user_time = datetime.now().isoformat()
+    user_future = _executor.submit(_log_user, login_id, user_input, audio, user_time)
+    user_future.add_done_callback(_report_failure("user message analysis"))
+
+    parts = []
+    for delta in generate_response_stream(user_input, session_id or login_id):
+        parts.append(delta)
+        yield delta
+
+    bot_future = _executor.submit(_log_bot, user_future, login_id, "".join(parts), datetime.now().isoformat())
+    bot_future.add_done_callback(_report_failure("bot message logging"))
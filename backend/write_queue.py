@@ -0,0 +1,235 @@
+"""
+chat_log / emotions write-behind 큐
+
+대화 한 턴이 DB 지연을 기다리지 않도록, 기록은 큐에 넣기만 하고
+백그라운드 스레드가 짧은 간격(WEAKEND_WRITE_FLUSH_INTERVAL)으로 모아서 한 번에 insert 합니다.
+
+  1) chat_log 를 여러 행 한 번에 insert (insert 결과는 보낸 순서대로 돌아옴)
+  2) 돌려받은 chat_id 를 같은 위치의 감정 분석 결과에 붙여 emotions 도 한 번에 insert
+
+실패하면 지수 백오프로 재시도하고, 이미 저장된 chat_log 는 다시 넣지 않습니다.
+제약 조건 위반처럼 다시 보내도 실패할 오류는 묶음을 반씩 나눠 문제 행만 골라 바로 버리므로,
+잘못된 행 하나 때문에 같은 묶음의 다른 기록이 저장되지 못하는 일은 없습니다.
+프로세스 종료 시(atexit) 남은 기록을 모두 flush 합니다.
+"""
+import os
+import time
+import queue
+import atexit
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from backend.storage import Storage, get_storage
+from utils.tracing import trace
+
+WRITE_BEHIND = os.getenv("WEAKEND_WRITE_BEHIND", "1") == "1"
+FLUSH_INTERVAL = float(os.getenv("WEAKEND_WRITE_FLUSH_INTERVAL", "0.2"))
+BATCH_SIZE = int(os.getenv("WEAKEND_WRITE_BATCH_SIZE", "100"))
+MAX_RETRIES = int(os.getenv("WEAKEND_WRITE_MAX_RETRIES", "5"))
+RETRY_BACKOFF = float(os.getenv("WEAKEND_WRITE_RETRY_BACKOFF", "0.5"))
+SHUTDOWN_TIMEOUT = float(os.getenv("WEAKEND_WRITE_SHUTDOWN_TIMEOUT", "10"))
+
+
+@dataclass
+class ChatRecord:
+    """chat_log 한 행 + (user 메시지라면) 그에 딸린 emotions 한 행"""
+    chat: dict
+    emotion: Optional[dict] = None       # chat_id 를 뺀 emotions 행
+    chat_id: Optional[int] = None        # chat_log 저장 후 채워짐
+    attempts: int = 0
+    retry_at: float = 0.0                # 재시도 가능 시각 (time.monotonic)
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+class WriteBehindQueue:
+    def __init__(self, storage: Optional[Storage] = None, flush_interval: float = FLUSH_INTERVAL,
+                 batch_size: int = BATCH_SIZE, max_retries: int = MAX_RETRIES):
+        self._storage = storage
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.written = 0
+        self.dropped = 0
+        self.retries = 0
+        self._queue: "queue.Queue[ChatRecord]" = queue.Queue()
+        self._pending: List[ChatRecord] = []     # 재시도 대기 중인 기록
+        self._listeners: List[Callable[[List[ChatRecord]], None]] = []
+        self._lock = threading.Lock()            # flush 는 한 번에 하나만
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def storage(self) -> Storage:
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    # ── 넣기 ──────────────────────────────────────────────────────────────
+    def submit(self, chat: dict, emotion: Optional[dict] = None) -> ChatRecord:
+        record = ChatRecord(chat, emotion)
+        self._queue.put(record)
+        self._ensure_started()
+        return record
+
+    def add_listener(self, fn: Callable[[List[ChatRecord]], None]) -> None:
+        """flush 가 끝난 기록 목록을 받는 콜백 (캐시 무효화 등)"""
+        self._listeners.append(fn)
+
+    # ── 백그라운드 flush ──────────────────────────────────────────────────
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[Warning] write-behind flush failed: {e}")
+
+    def _drain(self) -> List[ChatRecord]:
+        batch, self._pending = self._pending, []
+        for _ in range(self.batch_size):
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> int:
+        """큐에 쌓인 기록을 batch_size 씩 저장. 저장한 기록 수를 반환"""
+        total = 0
+        with self._lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                ready = [r for r in batch if not self._backing_off(r)]
+                if not ready:
+                    self._pending = batch
+                    break
+                self._pending = [r for r in batch if self._backing_off(r)]
+                written = self._write(ready)
+                total += len(written)
+                if written:
+                    for fn in self._listeners:
+                        try:
+                            fn(written)
+                        except Exception as e:
+                            print(f"[Warning] write-behind listener failed: {e}")
+                if len(written) < len(ready):
+                    break    # 실패한 기록은 다음 주기에 재시도
+        return total
+
+    @staticmethod
+    def _backing_off(record: ChatRecord) -> bool:
+        return record.retry_at > time.monotonic()
+
+    def _write(self, batch: List[ChatRecord]) -> List[ChatRecord]:
+        """batch 를 저장하고, 완전히 저장된 기록만 반환 (실패한 기록은 _pending 으로)"""
+        # 1) chat_log (아직 chat_id 가 없는 기록만)
+        new = [r for r in batch if r.chat_id is None]
+        if new:
+            self._insert_isolating(new, self._insert_chat_logs, "chat_log")
+            batch = [r for r in batch if r.chat_id is not None]
+
+        # 2) emotions (chat_id 가 붙은 기록만)
+        with_emotion = [r for r in batch if r.emotion is not None]
+        if with_emotion:
+            saved = {id(r) for r in self._insert_isolating(with_emotion, self._insert_emotions, "emotions")}
+            batch = [r for r in batch if r.emotion is None or id(r) in saved]
+
+        for r in batch:
+            r.done.set()
+        self.written += len(batch)
+        return batch
+
+    def _insert_chat_logs(self, records: List[ChatRecord]) -> None:
+        with trace("db.chat_log.insert_batch"):
+            chat_ids = self.storage.insert_chat_logs([r.chat for r in records])
+        for r, chat_id in zip(records, chat_ids):
+            r.chat_id = chat_id
+
+    def _insert_emotions(self, records: List[ChatRecord]) -> None:
+        with trace("db.emotions.insert_batch"):
+            self.storage.insert_emotions([{"chat_id": r.chat_id, **r.emotion} for r in records])
+
+    def _insert_isolating(self, records: List[ChatRecord], insert: Callable[[List[ChatRecord]], None],
+                          table: str) -> List[ChatRecord]:
+        """
+        records 를 한 번에 insert 하고 저장된 기록을 반환.
+        일시적 오류면 모두 재시도로 넘기고, 잘못된 행 때문이면 반씩 나눠 다시 보내 그 행만 버림
+        (묶음 insert 는 한 트랜잭션이라 실패한 묶음은 한 행도 저장되지 않음)
+        """
+        try:
+            insert(records)
+            return records
+        except Exception as e:
+            if not self.storage.is_permanent_error(e):
+                print(f"[Warning] {table} batch insert failed ({len(records)} rows): {e}")
+                self._retry_later(records)
+                return []
+            if len(records) == 1:
+                self._drop(records[0], f"{table} insert rejected: {e}")
+                return []
+        mid = len(records) // 2
+        return self._insert_isolating(records[:mid], insert, table) + \
+            self._insert_isolating(records[mid:], insert, table)
+
+    def _retry_later(self, records: List[ChatRecord]) -> None:
+        for r in records:
+            r.attempts += 1
+            if r.attempts > self.max_retries:
+                self._drop(r, f"after {r.attempts} attempts")
+                continue
+            self.retries += 1
+            r.retry_at = time.monotonic() + RETRY_BACKOFF * (2 ** (r.attempts - 1))
+            self._pending.append(r)
+
+    def _drop(self, record: ChatRecord, reason: str) -> None:
+        self.dropped += 1
+        print(f"[Warning] dropping chat record {record.chat.get('chat_time')} ({reason})")
+        record.done.set()
+
+    # ── 종료 ──────────────────────────────────────────────────────────────
+    def close(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """남은 기록을 (재시도 포함) timeout 초 안에서 모두 flush"""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.flush()
+            if self._queue.empty() and not self._pending:
+                return
+            time.sleep(min(RETRY_BACKOFF, max(0.0, deadline - time.monotonic())))
+        left = self._queue.qsize() + len(self._pending)
+        if left:
+            print(f"[Warning] write-behind queue closed with {left} unsaved records")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "pending_retry": len(self._pending),
+            "written": self.written,
+            "retries": self.retries,
+            "dropped": self.dropped,
+        }
+
+
+write_queue = WriteBehindQueue()
+atexit.register(write_queue.close)
+
+
+def submit_chat(chat: dict, emotion: Optional[dict] = None) -> ChatRecord:
+    """
+    chat_log(+emotions) 기록을 저장. WEAKEND_WRITE_BEHIND=0 이면 바로 저장하고 돌아옴
+    """
+    record = write_queue.submit(chat, emotion)
+    if not WRITE_BEHIND:
+        write_queue.flush()
+    return record
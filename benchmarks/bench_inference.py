@@ -0,0 +1,351 @@
+"""
+오프라인 추론 벤치마크
+
+Google Drive·HF Hub 없이 MODEL_CONFIGS 의 각 모델을 로컬 config 와 임의(random) 가중치로 만들고,
+길이가 다른 합성 한국어 문장과 합성 음성으로 다음을 측정합니다.
+
+임의 가중치는 임시 시드 디렉터리에 safetensors 로 저장한 뒤, 앱과 같은 경로
+(fetch_weights → load_weights → build_model_from_state_dict)로 임시 모델 저장소를 거쳐 로드합니다.
+
+  - 모델별 로드 시간, 로드 전후 RSS 증가량 (프로세스 peak RSS 는 누적값으로 따로 기록)
+  - 모델별 / 모달리티별(text, speech) / 전체 앙상블 p50·p95·p99 지연 시간과 처리량
+
+결과는 JSON 으로 저장해 릴리스 간에 diff 할 수 있습니다.
+
+    python -m benchmarks.bench_inference --output bench.json
+    python -m benchmarks.bench_inference --backend int8 --execution-mode thread --iterations 50
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+import transformers
+from safetensors.torch import save_file
+from transformers import (
+    AutoModelForSequenceClassification, AutoTokenizer,
+    Wav2Vec2Config, Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification,
+)
+
+import inference
+from utils.audio import AudioClip
+from utils.load_model_from_drive import (
+    _local_dirs, _params_on_meta, build_model_from_state_dict, load_config, load_pretrained_component,
+)
+from utils.model_store import fetch_weights, load_weights
+
+# 합성 문장용 어휘 (감정 표현 + 일상 단어)
+_WORDS = [
+    "오늘", "너무", "힘들어", "괜찮아", "회사", "친구", "가족", "시험", "진짜", "조금",
+    "화가", "나", "불안해", "무서워", "외로워", "행복해", "슬퍼", "그냥", "요즘", "계속",
+    "잠을", "못", "잤어", "밥을", "먹었어", "날씨가", "좋아서", "기분이", "이상해", "왜",
+    "자꾸", "생각이", "나서", "눈물이", "났어", "웃겼어", "창피했어", "답답해", "지쳤어", "고마워",
+]
+TEXT_LENGTHS = {"short": 3, "medium": 15, "long": 60}     # 단어 수
+AUDIO_SECONDS = {"short": 1.0, "medium": 3.0, "long": 10.0}
+
+
+def _rss_peak_mb() -> float:
+    # 프로세스 시작 이후 누적 최댓값. Linux 의 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rss_mb() -> float:
+    """현재 RSS (모델 하나를 로드하며 늘어난 양을 재기 위해). /proc 가 없으면 peak 로 대체"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return _rss_peak_mb()
+
+
+def synthetic_texts(n: int, n_words: int, rng: random.Random) -> List[str]:
+    return [" ".join(rng.choice(_WORDS) for _ in range(n_words)) for _ in range(n)]
+
+
+def synthetic_clip(seconds: float, rng: np.random.Generator, sr: int = 44100) -> AudioClip:
+    """기본 주파수가 흔들리는 배음 + 잡음으로 만든 말소리 비슷한 신호"""
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = 120 + 40 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    y = sum(np.sin(k * phase) / k for k in range(1, 6))
+    y = y * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)) + 0.05 * rng.standard_normal(len(t))
+    y = (y / np.abs(y).max() * 0.8).astype(np.float32)
+    return AudioClip(y, sr)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 임의 가중치 모델 만들기 (네트워크 없음)
+# ─────────────────────────────────────────────────────────────────────────────
+def _has_local_config(model_name: str) -> bool:
+    safe_name = model_name.replace("/", "_")
+    return any(os.path.exists(os.path.join(d, "config.json")) for d in _local_dirs("configs", safe_name))
+
+
+def _hubert_config(cfg: dict) -> Wav2Vec2Config:
+    if _has_local_config(cfg["model_name"]):
+        return load_config(cfg["model_name"], len(cfg["label_map"]), Wav2Vec2Config)
+    # 레포에 HuBERT config 가 없으면 같은 크기(base)의 기본 설정으로 대체
+    return Wav2Vec2Config(num_labels=len(cfg["label_map"]))
+
+
+def _random_state_dict(cfg: dict) -> Dict[str, torch.Tensor]:
+    n = len(cfg["label_map"])
+    if cfg["type"] == "text":
+        model = AutoModelForSequenceClassification.from_config(load_config(cfg["model_name"], n))
+    elif cfg["name"] == "hubert":
+        model = Wav2Vec2ForSequenceClassification(_hubert_config(cfg))
+    else:
+        model = inference.CNNSpeech(n)
+    # safetensors 는 저장소를 공유하는 텐서를 허용하지 않으므로 각각 복사해 저장
+    return {k: v.detach().clone().contiguous() for k, v in model.state_dict().items()}
+
+
+def write_seed_weights(cfgs: List[dict], seed_dir: str) -> None:
+    """임의 가중치를 <seed_dir>/<name>.safetensors 로 저장 (fetch_weights 가 시드로 가져감)"""
+    for cfg in cfgs:
+        save_file(_random_state_dict(cfg), os.path.join(seed_dir, f"{cfg['name']}.safetensors"))
+
+
+def _load_text(cfg: dict, store_dir: str, seed_dir: str):
+    # load_model_and_tokenizer_from_drive 와 같은 단계 (st.spinner 만 뺌)
+    wpath = fetch_weights(cfg["name"], cfg["file_id"], store_dir=store_dir, seed_dir=seed_dir,
+                          allow_download=False)
+    tokenizer = load_pretrained_component(AutoTokenizer, cfg["model_name"])
+    model = build_model_from_state_dict(
+        AutoModelForSequenceClassification, cfg["model_name"], len(cfg["label_map"]), load_weights(wpath)
+    )
+    return model, tokenizer
+
+
+def _load_speech(cfg: dict, store_dir: str, seed_dir: str):
+    # load_speech_models 와 같은 단계
+    wpath = fetch_weights(cfg["name"], cfg["file_id"], store_dir=store_dir, seed_dir=seed_dir,
+                          allow_download=False)
+    state_dict = load_weights(wpath)
+    if cfg["name"] != "hubert":
+        cnn = inference.CNNSpeech(len(cfg["label_map"]))
+        cnn.load_state_dict(state_dict)
+        return cnn.eval(), None
+
+    proc = Wav2Vec2FeatureExtractor(
+        feature_size=1, sampling_rate=inference.HUBERT_SR, padding_value=0.0, do_normalize=True
+    )
+    if _has_local_config(cfg["model_name"]):
+        model = build_model_from_state_dict(
+            Wav2Vec2ForSequenceClassification, cfg["model_name"], len(cfg["label_map"]), state_dict
+        )
+        return model, proc
+    # 로컬 config 가 없으면 build_model_from_state_dict 는 허브로 가므로, 같은 방식(meta + assign)을 기본 config 로
+    with _params_on_meta():
+        model = Wav2Vec2ForSequenceClassification(_hubert_config(cfg))
+    model.load_state_dict(state_dict, assign=True)
+    return model.eval(), proc
+
+
+def build_models(backend: str, names: List[str], store_dir: str, seed_dir: str) -> Dict[str, dict]:
+    """{name: {model, tokenizer/proc, cfg, load_s, rss_delta_mb, rss_peak_total_mb}}"""
+    built = {}
+    for cfg in inference.MODEL_CONFIGS:
+        if cfg["name"] not in names:
+            continue
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        if cfg["type"] == "text":
+            model, tokenizer = _load_text(cfg, store_dir, seed_dir)
+            model = inference._convert_text_model(model, tokenizer, backend)
+            model.emotion_model_name = cfg["name"]
+            extra = {"tokenizer": tokenizer}
+        else:
+            model, proc = _load_speech(cfg, store_dir, seed_dir)
+            model = inference._convert_speech_model(model, cfg["name"], backend)
+            extra = {"proc": proc}
+        built[cfg["name"]] = {
+            "model": model, "cfg": cfg, **extra,
+            "load_s": time.perf_counter() - start,
+            "rss_delta_mb": _rss_mb() - rss_before,
+            "rss_peak_total_mb": _rss_peak_mb(),
+        }
+    return built
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 측정
+# ─────────────────────────────────────────────────────────────────────────────
+def measure(fn: Callable, inputs: list, warmup: int, items_per_call: float = 1) -> dict:
+    for x in inputs[:warmup]:
+        fn(x)
+    latencies = []
+    start = time.perf_counter()
+    for x in inputs:
+        t0 = time.perf_counter()
+        fn(x)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "n": len(latencies),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(np.mean(latencies)), 3),
+        "throughput_per_s": round(len(latencies) * items_per_call / total, 3),
+    }
+
+
+def run(args) -> dict:
+    torch.manual_seed(args.seed)
+    rng = random.Random(args.seed)
+    np_rng = np.random.default_rng(args.seed)
+    names = args.models or [c["name"] for c in inference.MODEL_CONFIGS]
+    threads = args.threads
+    if not threads and args.execution_mode == "thread":
+        # 앱(load_text_executor)과 같은 기본값: 동시에 도는 텍스트 모델 수로 코어를 나눔
+        threads = inference._default_intra_op_threads(
+            sum(1 for c in inference.MODEL_CONFIGS if c["type"] == "text" and c["name"] in names))
+    if threads:
+        torch.set_num_threads(threads)
+    tmp = tempfile.TemporaryDirectory(prefix="weakend-bench-", ignore_cleanup_errors=True)
+    seed_dir, store_dir = os.path.join(tmp.name, "seed"), os.path.join(tmp.name, "models")
+    os.makedirs(seed_dir)
+    write_seed_weights([c for c in inference.MODEL_CONFIGS if c["name"] in names], seed_dir)
+
+    rss_before = _rss_mb()
+    load_start = time.perf_counter()
+    built = build_models(args.backend, names, store_dir, seed_dir)
+    load_total = time.perf_counter() - load_start
+
+    texts = {k: synthetic_texts(args.iterations, n, rng) for k, n in TEXT_LENGTHS.items()}
+    clips = {k: [synthetic_clip(sec, np_rng) for _ in range(max(1, args.iterations // 5))]
+             for k, sec in AUDIO_SECONDS.items()}
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "cpu_count": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+            "backend": args.backend,
+            "execution_mode": args.execution_mode,
+            "audio_windowed": inference.AUDIO_WINDOWED,
+            "iterations": args.iterations,
+            "seed": args.seed,
+        },
+        "load": {
+            "total_s": round(load_total, 3),
+            "rss_before_mb": round(rss_before, 1),
+            "rss_delta_mb": round(_rss_mb() - rss_before, 1),
+            "rss_peak_total_mb": round(_rss_peak_mb(), 1),
+            "models": {n: {"load_s": round(b["load_s"], 3),
+                           "rss_delta_mb": round(b["rss_delta_mb"], 1),
+                           "rss_peak_total_mb": round(b["rss_peak_total_mb"], 1)}
+                       for n, b in built.items()},
+        },
+        "models": {},
+        "modalities": {},
+    }
+
+    # 1) 모델별
+    for name, b in built.items():
+        cfg, model = b["cfg"], b["model"]
+        report["models"][name] = {}
+        if cfg["type"] == "text":
+            for size, xs in texts.items():
+                report["models"][name][size] = measure(
+                    lambda t: inference._score_text(model, cfg["label_map"], b["tokenizer"], t),
+                    xs, args.warmup)
+        else:
+            for size, xs in clips.items():
+                report["models"][name][size] = measure(
+                    lambda c: inference._score_speech(model, b["proc"], cfg["label_map"], name, c),
+                    xs, min(args.warmup, 1))
+
+    # 2) 모달리티별 / 전체 앙상블 (실제 predict 경로 사용, 예측 캐시는 거치지 않음)
+    text_names = [n for n, b in built.items() if b["cfg"]["type"] == "text"]
+    speech_names = [n for n, b in built.items() if b["cfg"]["type"] == "speech"]
+    executor = inference._make_text_executor(len(text_names)) \
+        if args.execution_mode == "thread" and text_names else None
+    inference.install_ensemble(
+        text=([(built[n]["model"], built[n]["cfg"]["label_map"]) for n in text_names],
+              [built[n]["tokenizer"] for n in text_names], executor) if text_names else None,
+        speech=[(built[n]["model"], built[n]["proc"], built[n]["cfg"]["label_map"], n)
+                for n in speech_names] if speech_names else None,
+    )
+
+    if text_names:
+        report["modalities"]["text"] = {
+            size: measure(lambda t: inference._predict_emotion_uncached(t), xs, args.warmup)
+            for size, xs in texts.items()
+        }
+        report["modalities"]["text_batch"] = {}
+        for size, xs in texts.items():
+            batches = [xs[i:i + args.batch_size] for i in range(0, len(xs), args.batch_size)]
+            report["modalities"]["text_batch"][size] = measure(
+                lambda batch: inference._run_text_models(
+                    inference._predict_text_labels_batch, batch, args.batch_size),
+                batches, 0, items_per_call=len(xs) / len(batches))
+        report["modalities"]["text_cascade"] = {
+            size: measure(lambda t: inference.predict_emotion_cascade(t), xs, args.warmup)
+            for size, xs in texts.items()
+        }
+    if speech_names:
+        report["modalities"]["speech"] = {
+            size: measure(lambda c: inference._predict_emotion_uncached(None, c), xs, min(args.warmup, 1))
+            for size, xs in clips.items()
+        }
+    if text_names and speech_names:
+        pairs = list(zip(texts["medium"], clips["medium"]))
+        report["modalities"]["ensemble"] = {
+            "medium": measure(lambda p: inference._predict_emotion_uncached(p[0], p[1]), pairs, 1)
+        }
+
+    if executor is not None:
+        executor.shutdown()
+    # 가중치가 임시 저장소 파일에 메모리 맵으로 물려 있어 지우지 못하는 플랫폼(Windows)은 남겨 둠
+    tmp.cleanup()
+    return report
+
+
+def _print_summary(report: dict) -> None:
+    print(f"load: {report['load']['total_s']}s, +{report['load']['rss_delta_mb']} MB RSS "
+          f"(process peak {report['load']['rss_peak_total_mb']} MB)")
+    for group in ("models", "modalities"):
+        for name, sizes in report[group].items():
+            for size, r in sizes.items():
+                print(f"  {name:<14} {size:<7} p50={r['p50_ms']:>9.2f}ms p95={r['p95_ms']:>9.2f}ms "
+                      f"p99={r['p99_ms']:>9.2f}ms  {r['throughput_per_s']:>8.2f}/s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="오프라인 추론 벤치마크 (임의 가중치)")
+    parser.add_argument("--backend", choices=inference.BACKENDS, default="fp32")
+    parser.add_argument("--execution-mode", choices=("sequential", "thread"), default="sequential")
+    parser.add_argument("--models", nargs="*", help="측정할 모델 이름 (기본: 전체)")
+    parser.add_argument("--iterations", type=int, default=30, help="텍스트 길이별 샘플 수 (음성은 1/5)")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=0,
+                        help="torch intra-op 스레드 수 (0 이면 기본값, thread 모드는 cpu_count // 텍스트 모델 수)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    _print_summary(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+write-behind 큐 동작 점검 (로컬 SQLite, 네트워크 없음)
+
+임시 SQLite 파일에 WriteBehindQueue 를 붙이고 다음을 확인합니다.
+
+  - emotions insert 가 일시적으로 실패하면 재시도하되 chat_log 는 다시 넣지 않음
+  - max_retries 를 넘기면 기록을 버리고 done 을 알림
+  - 묶음 안의 잘못된 행(NOT NULL 위반)은 재시도 없이 그 행만 버리고 나머지는 저장
+  - emotions 행의 chat_id 가 같은 기록의 chat_log 행을 가리킴
+  - close() 가 batch_size 보다 많이 쌓인 기록까지 모두 저장
+
+    python -m benchmarks.check_write_queue
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from typing import List
+
+# 재시도 간격을 짧게 (backend.write_queue 를 import 하기 전에 설정해야 반영됨)
+os.environ.setdefault("WEAKEND_WRITE_RETRY_BACKOFF", "0.01")
+
+from backend.storage.sqlite_storage import SQLiteStorage  # noqa: E402
+from backend.write_queue import WriteBehindQueue  # noqa: E402
+
+# 백그라운드 스레드가 끼어들지 않도록 flush 는 close() 에서만 일어나게 함
+IDLE_FLUSH_INTERVAL = 3600
+
+
+class FlakyStorage(SQLiteStorage):
+    """처음 fail_emotions 번의 emotions insert 를 실패시키는 SQLite 저장소"""
+
+    def __init__(self, path: str, fail_emotions: int = 0):
+        super().__init__(path)
+        self.fail_emotions = fail_emotions
+        self.chat_log_calls = 0
+        self.emotion_calls = 0
+
+    def insert_chat_logs(self, rows: List[dict]) -> List[int]:
+        self.chat_log_calls += 1
+        return super().insert_chat_logs(rows)
+
+    def insert_emotions(self, rows: List[dict]) -> None:
+        self.emotion_calls += 1
+        if self.fail_emotions > 0:
+            self.fail_emotions -= 1
+            raise sqlite3.OperationalError("database is locked (simulated)")
+        super().insert_emotions(rows)
+
+
+def _check(cond: bool, message: str) -> None:
+    if not cond:
+        raise AssertionError(message)
+
+
+def _storage(tmp_dir: str, name: str, fail_emotions: int):
+    """(저장소, 사용자 userid)"""
+    storage = FlakyStorage(os.path.join(tmp_dir, f"{name}.sqlite3"), fail_emotions)
+    storage.insert_user({"login_id": name, "password": "x", "birthdate": None, "region_id": None,
+                         "phonenumber": None, "gender": None, "last_activity": None,
+                         "signup_date": None, "role": "user"})
+    return storage, storage.get_userid(name)
+
+
+def _chat(userid: int, i: int, role: str = "user") -> dict:
+    return {"userid": userid, "chat_time": f"2024-01-01T00:00:{i:02d}",
+            "chat_content": f"message {i}", "chat_role": role}
+
+
+def _emotion(i: int) -> dict:
+    return {"main_category_id": 1, "middle_category_id": 1 + i % 3,
+            "emotion_score": 0.5, "analysis_date": "2024-01-01"}
+
+
+def _rows(storage: FlakyStorage, table: str) -> List[dict]:
+    return storage._all(f"SELECT * FROM {table}")
+
+
+def check_retry_without_duplicate(tmp_dir: str) -> None:
+    storage, userid = _storage(tmp_dir, "retry", fail_emotions=2)
+    q = WriteBehindQueue(storage, flush_interval=IDLE_FLUSH_INTERVAL, max_retries=5)
+    records = [q.submit(_chat(userid, 0), _emotion(0)),
+               q.submit(_chat(userid, 1, "bot")),
+               q.submit(_chat(userid, 2), _emotion(2))]
+    q.close(timeout=5)
+
+    chats = {r["chat_id"]: r for r in _rows(storage, "chat_log")}
+    emotions = _rows(storage, "emotions")
+    _check(len(chats) == 3, f"chat_log rows: expected 3, got {len(chats)}")
+    _check(storage.chat_log_calls == 1, f"chat_log inserted {storage.chat_log_calls} times")
+    _check(storage.emotion_calls == 3, f"emotions insert calls: expected 3, got {storage.emotion_calls}")
+    _check(len(emotions) == 2, f"emotions rows: expected 2, got {len(emotions)}")
+    _check(q.retries == 4 and q.dropped == 0, f"unexpected stats: {q.stats()}")
+    for r in records:
+        _check(r.done.is_set(), f"record not done: {r.chat}")
+        _check(chats[r.chat_id]["chat_content"] == r.chat["chat_content"], f"wrong chat_id for {r.chat}")
+    for e in emotions:
+        i = int(chats[e["chat_id"]]["chat_content"].split()[-1])
+        _check(e["middle_category_id"] == _emotion(i)["middle_category_id"], f"emotion linked to wrong chat: {e}")
+
+
+def check_drop_after_max_retries(tmp_dir: str) -> None:
+    storage, userid = _storage(tmp_dir, "drop", fail_emotions=1000)
+    q = WriteBehindQueue(storage, flush_interval=IDLE_FLUSH_INTERVAL, max_retries=2)
+    record = q.submit(_chat(userid, 0), _emotion(0))
+    q.close(timeout=5)
+
+    _check(record.done.is_set(), "dropped record was not marked done")
+    _check(record.attempts == 3, f"attempts: expected 3, got {record.attempts}")
+    _check(q.dropped == 1 and q.stats()["pending_retry"] == 0, f"unexpected stats: {q.stats()}")
+    _check(storage.emotion_calls == 3, f"emotions insert calls: expected 3, got {storage.emotion_calls}")
+    _check(len(_rows(storage, "chat_log")) == 1, "chat_log was inserted more than once")
+    _check(not _rows(storage, "emotions"), "dropped emotion was stored")
+
+
+def check_bad_row_isolated(tmp_dir: str) -> None:
+    storage, userid = _storage(tmp_dir, "bad_row", fail_emotions=0)
+    q = WriteBehindQueue(storage, flush_interval=IDLE_FLUSH_INTERVAL, max_retries=2)
+    bad_chat = {**_chat(userid, 1), "chat_content": None}
+    bad_emotion = {**_emotion(3), "emotion_score": None}
+    good = [q.submit(_chat(userid, 0), _emotion(0)),
+            q.submit(_chat(userid, 2), _emotion(2)),
+            q.submit(_chat(userid, 4), _emotion(4))]
+    bad = q.submit(bad_chat, _emotion(1))
+    emotion_rejected = q.submit(_chat(userid, 3), bad_emotion)
+    q.close(timeout=5)
+
+    chats = {r["chat_id"]: r for r in _rows(storage, "chat_log")}
+    emotion_chat_ids = {e["chat_id"] for e in _rows(storage, "emotions")}
+    _check(q.written == 3 and q.dropped == 2 and q.retries == 0, f"unexpected stats: {q.stats()}")
+    _check(len(chats) == 4, f"chat_log rows: expected 4, got {len(chats)}")
+    _check(bad.chat_id is None and bad.done.is_set(), "bad chat_log row was not dropped")
+    _check(emotion_rejected.chat_id in chats and emotion_rejected.chat_id not in emotion_chat_ids,
+           "chat_log of the rejected emotion should be kept without an emotion")
+    for r in good:
+        _check(r.done.is_set() and r.chat_id in emotion_chat_ids, f"valid record lost: {r.chat}")
+
+
+def check_close_drains(tmp_dir: str) -> None:
+    storage, userid = _storage(tmp_dir, "drain", fail_emotions=0)
+    q = WriteBehindQueue(storage, flush_interval=IDLE_FLUSH_INTERVAL, batch_size=2)
+    records = [q.submit(_chat(userid, i), _emotion(i)) for i in range(5)]
+    q.close(timeout=5)
+
+    chats = _rows(storage, "chat_log")
+    _check(len(chats) == 5 and len(_rows(storage, "emotions")) == 5, f"not drained: {q.stats()}")
+    _check([r.chat_id for r in records] == [c["chat_id"] for c in chats], "chat_ids out of submit order")
+    _check(all(r.done.is_set() for r in records), "records not marked done")
+
+
+CHECKS = [check_retry_without_duplicate, check_drop_after_max_retries, check_bad_row_isolated, check_close_drains]
+
+
+def main(argv=None) -> int:
+    failed = 0
+    with tempfile.TemporaryDirectory(prefix="weakend-write-queue-") as tmp_dir:
+        for check in CHECKS:
+            try:
+                check(tmp_dir)
+                print(f"ok    {check.__name__}")
+            except AssertionError as e:
+                failed += 1
+                print(f"FAIL  {check.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
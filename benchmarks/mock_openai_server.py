@@ -0,0 +1,150 @@
+"""
+로컬 OpenAI 호환 모의 서버 (테스트·부하 테스트용)
+
+POST /v1/chat/completions 만 지원합니다. stream=true 이면 SSE(data: {...}) 로 조각을 나눠 보냅니다.
+지연 시간·오류율을 조절해 재시도·hedging·동시성 제한 동작을 재현할 수 있습니다.
+
+    python -m benchmarks.mock_openai_server --port 8765 --latency-ms 300 --jitter-ms 200 --error-rate 0.05
+    WEAKEND_LLM_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock streamlit run app.py
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_REPLIES = [
+    "그랬구나, 많이 힘들었겠다. 조금 더 이야기해 줄 수 있어?",
+    "그런 마음이 드는 게 당연해. 지금은 어떤 기분이야?",
+    "이야기해 줘서 고마워. 그때 어떤 생각이 들었어?",
+    "정말 속상했겠다. 천천히 말해도 괜찮아.",
+]
+
+
+class MockConfig:
+    latency_ms = 300.0        # 첫 응답까지 평균 지연
+    jitter_ms = 100.0         # 지연의 표준편차 (정규분포, 0 이하는 0)
+    tail_rate = 0.0           # 이 확률로 지연을 tail_ms 만큼 더함 (꼬리 지연 재현)
+    tail_ms = 3000.0
+    token_interval_ms = 20.0  # 스트리밍 조각 사이 간격
+    error_rate = 0.0          # 이 확률로 500 응답
+    rate_limit_rate = 0.0     # 이 확률로 429 응답
+
+
+def _tokens(text: str):
+    # 두 글자씩 잘라 스트리밍 조각처럼 보냄
+    return [text[i:i + 2] for i in range(0, len(text), 2)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self._json(404, {"error": {"message": "not found"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        delay = max(0.0, random.gauss(MockConfig.latency_ms, MockConfig.jitter_ms))
+        if random.random() < MockConfig.tail_rate:
+            delay += MockConfig.tail_ms
+        time.sleep(delay / 1000)
+
+        roll = random.random()
+        if roll < MockConfig.error_rate:
+            self._json(500, {"error": {"message": "mock internal error", "type": "server_error"}})
+            return
+        if roll < MockConfig.error_rate + MockConfig.rate_limit_rate:
+            self._json(429, {"error": {"message": "mock rate limit", "type": "rate_limit_error"}})
+            return
+
+        reply = random.choice(_REPLIES)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = request.get("model", "mock")
+        if not request.get("stream"):
+            self._json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": reply}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(delta: dict, finish_reason=None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            send({"role": "assistant", "content": ""})
+            for token in _tokens(reply):
+                send({"content": token})
+                time.sleep(MockConfig.token_interval_ms / 1000)
+            send({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass    # 클라이언트가 먼저 끊음 (hedge 에서 진 요청 등)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="OpenAI 호환 모의 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=MockConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=MockConfig.jitter_ms)
+    parser.add_argument("--tail-rate", type=float, default=MockConfig.tail_rate)
+    parser.add_argument("--tail-ms", type=float, default=MockConfig.tail_ms)
+    parser.add_argument("--token-interval-ms", type=float, default=MockConfig.token_interval_ms)
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=MockConfig.rate_limit_rate)
+    args = parser.parse_args(argv)
+
+    MockConfig.latency_ms = args.latency_ms
+    MockConfig.jitter_ms = args.jitter_ms
+    MockConfig.tail_rate = args.tail_rate
+    MockConfig.tail_ms = args.tail_ms
+    MockConfig.token_interval_ms = args.token_interval_ms
+    MockConfig.error_rate = args.error_rate
+    MockConfig.rate_limit_rate = args.rate_limit_rate
+
+    server = serve(args.host, args.port)
+    print(f"mock OpenAI server on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
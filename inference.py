@@ -1,49 +1,77 @@
 import os
+import time
+import threading
 import torch
-from typing import Tuple, Optional
+from typing import Tuple, Optional, List
 import streamlit as st
 from collections import Counter
-from utils.load_model_from_drive import load_model_and_tokenizer_from_drive
+from utils.load_model_from_drive import (
+    load_model_and_tokenizer_from_drive, build_model_from_state_dict, load_pretrained_component
+)
+from utils.audio import AudioClip
+from utils.model_store import fetch_weights, load_weights
+from utils.prediction_cache import PredictionCache, model_set_version
+from utils.tracing import trace
 from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
-import soundfile as sf
 import numpy as np
 import librosa
 import torch.nn as nn
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 1) 모델 및 레이블 맵 설정
+#    가중치는 utils.model_store 가 name 별로 관리합니다.
+#    항목에 "sha256" 을 추가하면 받은 가중치 원본의 체크섬을 검증합니다.
+#    "cost" 는 CPU 기준 상대 추론 비용 (cascade 모드에서 싼 모델부터 실행)
 # ─────────────────────────────────────────────────────────────────────────────
 MODEL_CONFIGS = [
     {"name":"koelectra","file_id":"1nCl-o_k9u2zcPT4sMcDsUlP1Y66VJaOw",
-     "model_name":"monologg/koelectra-base-discriminator","type":"text",
+     "model_name":"monologg/koelectra-base-discriminator","type":"text","cost":1.0,
      "label_map":{i:lbl for i,lbl in enumerate([
          "슬픔","소외","분노","불안","긍정","중립","당황","위협"
      ])}
     },
     {"name":"kcbert","file_id":"1i5xnpSkYu4gdKGgSU7VmMWOqyfYU626B",
-     "model_name":"beomi/kcbert-base","type":"text",
+     "model_name":"beomi/kcbert-base","type":"text","cost":1.0,
      "label_map":{i:lbl for i,lbl in enumerate([
          "슬픔","소외","분노","불안","긍정","중립","당황","위협"
      ])}
     },
     {"name":"kluebert","file_id":"1ADvs5BQNsG757iWutSOdXyu3fN6e2Sgd",
-     "model_name":"klue/bert-base","type":"text",
+     "model_name":"klue/bert-base","type":"text","cost":1.0,
      "label_map":{i:lbl for i,lbl in enumerate([
          "슬픔","소외","분노","불안","긍정","중립","당황","위협"
      ])}
     },
     {"name":"hubert","file_id":"1v1k3_ZV0EYo4MhxbaeQM2gpKensokuuQ",
-     "model_name":"facebook/hubert-base-ls960","type":"speech",
+     "model_name":"facebook/hubert-base-ls960","type":"speech","cost":3.0,
      # hubert logits index+1 → label_map
      "label_map":{1:"긍정",2:"슬픔",3:"분노",4:"불안",5:"소외",6:"당황",7:"중립"}
     },
     {"name":"cnn_speech","file_id":"18-zsM0w6ClOkovigkzTyfqgCwWGgA0ItID_5",
-     "model_name":None,"type":"speech",
+     "model_name":None,"type":"speech","cost":0.2,
      # CNN 모델은 로컬 mel-spectrogram 기반 커스텀
      "label_map":{0:"슬픔",1:"소외",2:"분노",3:"불안",4:"긍정",5:"중립",6:"당황",7:"위협"}
     },
 ]
 
+# 텍스트 모델 실행 방식: "sequential"(기본, 순차) 또는 "thread"(모델별 동시 실행)
+EXECUTION_MODE = os.getenv("WEAKEND_EXECUTION_MODE", "sequential")
+# thread 모드에서 설정하는 torch intra-op 스레드 수. torch.set_num_threads 는 프로세스 전체 설정이라
+# 워커별 제한이 아니며 음성 모델·cascade 등 모든 torch 연산에 적용됩니다.
+# 미설정(기본)이면 텍스트 모델들이 동시에 돌며 코어를 나눠 쓰도록 cpu_count // 텍스트 모델 수 로 정합니다.
+INTRA_OP_THREADS = int(os.getenv("WEAKEND_INTRA_OP_THREADS", "0")) or None
+# 추론 백엔드: "fp32"(기본, eager) / "int8"(동적 양자화) / "torchscript"(trace 그래프)
+# fp32 이외의 백엔드는 CPU 전용입니다.
+INFERENCE_BACKEND = os.getenv("WEAKEND_INFERENCE_BACKEND", "fp32")
+BACKENDS = ("fp32", "int8", "torchscript")
+# cascade 모드: 비용 순으로 모델을 돌리다가 투표가 확정되거나,
+# CASCADE_MIN_AGREE 개 이상이 같은 라벨을 CASCADE_CONFIDENCE 이상 확률로 내면 중단
+CASCADE = os.getenv("WEAKEND_CASCADE", "0") == "1"
+CASCADE_CONFIDENCE = float(os.getenv("WEAKEND_CASCADE_CONFIDENCE", "0.9"))
+CASCADE_MIN_AGREE = int(os.getenv("WEAKEND_CASCADE_MIN_AGREE", "2"))
+
 # ─────────────────────────────────────────────────────────────────────────────
 # CNNSpeech 정의 (mel-spectrogram 입력용)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -61,10 +89,21 @@ class CNNSpeech(nn.Module):
         x = x.flatten(1)
         return self.fc(x)
 
-# mel-spectrogram 계산 함수
-def get_mel_spectrogram(path:str, sr:int=22050, n_mels:int=128, fmax:int=8000, width:int=128):
-    y,_ = librosa.load(path, sr=sr)
-    S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels, fmax=fmax)
+# 모델별 입력 샘플레이트
+HUBERT_SR = 16000
+CNN_SR = 22050
+MEL_HOP_LENGTH = 512  # librosa melspectrogram 기본 hop
+
+# 긴 음성 윈도우 모드: 고정 길이 윈도우를 hop 간격으로 밀며 예측하고 logits 평균으로 합침
+# (끄면 HuBERT 는 전체 파형 한 번, CNN 은 앞 128 프레임(~3초)만 사용하는 기존 방식)
+AUDIO_WINDOWED = os.getenv("WEAKEND_AUDIO_WINDOWED", "0") == "1"
+AUDIO_WINDOW_SEC = float(os.getenv("WEAKEND_AUDIO_WINDOW_SEC", "3.0"))
+AUDIO_HOP_SEC = float(os.getenv("WEAKEND_AUDIO_HOP_SEC", "1.5"))
+AUDIO_WINDOW_BATCH = int(os.getenv("WEAKEND_AUDIO_WINDOW_BATCH", "8"))
+# CNN 윈도우 폭(mel 프레임 수)도 AUDIO_WINDOW_SEC 에서 계산 (3초 → 129 프레임, 풀링이 adaptive 라 폭은 자유)
+CNN_WINDOW_FRAMES = max(1, int(AUDIO_WINDOW_SEC * CNN_SR / MEL_HOP_LENGTH))
+
+def _normalize_mel(S, width:int=128):
     S_dB = librosa.power_to_db(S, ref=np.max)
     S_norm = (S_dB - S_dB.min())/(S_dB.max()-S_dB.min()+1e-6)
     if S_norm.shape[1] < width:
@@ -73,91 +112,623 @@ def get_mel_spectrogram(path:str, sr:int=22050, n_mels:int=128, fmax:int=8000, w
         S_norm = S_norm[:,:width]
     return S_norm
 
+# mel-spectrogram 계산 함수 (파일 경로 또는 이미 디코딩된 AudioClip)
+def get_mel_spectrogram(audio, sr:int=CNN_SR, n_mels:int=128, fmax:int=8000, width:int=128):
+    if isinstance(audio, AudioClip):
+        y = audio.at(sr)
+    else:
+        y,_ = librosa.load(audio, sr=sr)
+    S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels, fmax=fmax)
+    return _normalize_mel(S, width)
+
+def _window_starts(length:int, window:int, hop:int) -> List[int]:
+    """길이 length 를 window 크기·hop 간격으로 덮는 시작 위치들 (마지막 윈도우는 끝에 맞춤)"""
+    if length <= window:
+        return [0]
+    starts = list(range(0, length - window + 1, max(1, hop)))
+    if starts[-1] + window < length:
+        starts.append(length - window)
+    return starts
+
+def get_mel_windows(clip: AudioClip, sr:int=CNN_SR, n_mels:int=128, fmax:int=8000,
+                    width:int=CNN_WINDOW_FRAMES, hop_sec:float=AUDIO_HOP_SEC) -> List[np.ndarray]:
+    """전체 클립의 mel-spectrogram 을 한 번 계산한 뒤 width 프레임 윈도우로 잘라 각각 정규화"""
+    S = librosa.feature.melspectrogram(y=clip.at(sr), sr=sr, n_mels=n_mels, fmax=fmax)
+    hop = int(hop_sec * sr / MEL_HOP_LENGTH)
+    return [_normalize_mel(S[:, a:a + width], width) for a in _window_starts(S.shape[1], width, hop)]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 추론 백엔드 변환 (int8 동적 양자화 / TorchScript)
+# ─────────────────────────────────────────────────────────────────────────────
+class _TextLogits(nn.Module):
+    """HF 분류 모델을 위치 인자 → logits 텐서 형태로 감싸 trace 가능하게 만듦"""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.model(
+            input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+        ).logits
+
+
+class _TracedTextClassifier(nn.Module):
+    """trace 된 텍스트 모델을 기존처럼 model(**inp).logits 로 호출하기 위한 래퍼"""
+    def __init__(self, traced):
+        super().__init__()
+        self.traced = traced
+    def forward(self, input_ids, attention_mask=None, token_type_ids=None):
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        if token_type_ids is None:
+            token_type_ids = torch.zeros_like(input_ids)
+        return SimpleNamespace(logits=self.traced(input_ids, attention_mask, token_type_ids))
+
+
+def _quantize_int8(model: nn.Module) -> nn.Module:
+    # Linear 레이어만 int8 동적 양자화 (BERT/HuBERT 연산량 대부분이 Linear)
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def _convert_text_model(model: nn.Module, tokenizer, backend: str) -> nn.Module:
+    if backend == "int8":
+        return _quantize_int8(model)
+    if backend == "torchscript":
+        ex = tokenizer("예시 문장입니다.", return_tensors='pt')
+        example = (
+            ex['input_ids'],
+            ex.get('attention_mask', torch.ones_like(ex['input_ids'])),
+            ex.get('token_type_ids', torch.zeros_like(ex['input_ids'])),
+        )
+        with torch.no_grad():
+            traced = torch.jit.trace(_TextLogits(model).eval(), example, strict=False)
+        return _TracedTextClassifier(traced).eval()
+    return model
+
+
+def _convert_speech_model(model: nn.Module, name: str, backend: str) -> nn.Module:
+    if backend == "int8":
+        return _quantize_int8(model)
+    if backend == "torchscript" and name == 'cnn_speech':
+        with torch.no_grad():
+            return torch.jit.trace(model, torch.zeros(1, 1, 128, 128))
+    # HuBERT 는 가변 길이 conv 특징 추출기 때문에 trace 대신 eager 로 유지
+    return model
+
+
+def _model_name(model: nn.Module) -> str:
+    return getattr(model, 'emotion_model_name', type(model).__name__)
+
+
+def _model_device(model: nn.Module) -> torch.device:
+    p = next(model.parameters(), None)
+    return p.device if p is not None else torch.device('cpu')
+
 # ─────────────────────────────────────────────────────────────────────────────
 # 전역 캐시: 모델·토크나이저·피처 익스트랙터 로드
 # ─────────────────────────────────────────────────────────────────────────────
+def _make_text_executor(num_models: int) -> ThreadPoolExecutor:
+    # 텍스트 모델마다 워커 하나. torch 스레드 수는 여기서 바꾸지 않음 (프로세스 전체 설정이므로)
+    return ThreadPoolExecutor(max_workers=max(1, num_models), thread_name_prefix="text-model")
+
+
+def _default_intra_op_threads(num_models: int) -> int:
+    """thread 모드 기본 intra-op 스레드 수: 동시에 도는 텍스트 모델들이 코어를 초과 구독하지 않도록 나눔"""
+    return max(1, (os.cpu_count() or 1) // max(1, num_models))
+
+
+def _check_backend(backend: str) -> torch.device:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    if backend == "fp32" and torch.cuda.is_available():
+        return torch.device('cuda')
+    return torch.device('cpu')
+
+
 @st.cache_resource
-def load_ensemble():
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+def load_text_models(backend: str = INFERENCE_BACKEND):
+    """텍스트 모델(koelectra, kcbert, kluebert)과 토크나이저만 로드합니다."""
+    device = _check_backend(backend)
     text_models, text_tokenizers = [], []
-    speech_modalities = []  # (model, processor or None, label_map, name)
+    for cfg in MODEL_CONFIGS:
+        if cfg['type'] != 'text':
+            continue
+        model, tokenizer = load_model_and_tokenizer_from_drive(
+            file_id=cfg['file_id'],
+            model_name=cfg['model_name'],
+            num_labels=len(cfg['label_map']),
+            name=cfg['name'],
+            sha256=cfg.get('sha256')
+        )
+        model = _convert_text_model(model.to(device).eval(), tokenizer, backend)
+        model.emotion_model_name = cfg['name']  # 구간별 지연 시간 기록용
+        text_models.append((model, cfg['label_map']))
+        text_tokenizers.append(tokenizer)
+    return text_models, text_tokenizers
 
+
+@st.cache_resource
+def load_speech_models(backend: str = INFERENCE_BACKEND):
+    """음성 모델(HuBERT, CNNSpeech)만 로드합니다."""
+    device = _check_backend(backend)
+    speech_modalities = []  # (model, processor or None, label_map, name)
     for cfg in MODEL_CONFIGS:
-        if cfg['type'] == 'text':
-            model, tokenizer = load_model_and_tokenizer_from_drive(
-                file_id=cfg['file_id'],
-                model_name=cfg['model_name'],
-                num_labels=len(cfg['label_map'])
+        if cfg['type'] != 'speech':
+            continue
+        if cfg['name'] == 'hubert':
+            feat_extractor = load_pretrained_component(Wav2Vec2FeatureExtractor, cfg['model_name'])
+            wpath = fetch_weights(cfg['name'], cfg['file_id'], cfg.get('sha256'))
+            mod = build_model_from_state_dict(
+                Wav2Vec2ForSequenceClassification, cfg['model_name'],
+                len(cfg['label_map']), load_weights(wpath)
             )
-            model.to(device).eval()
-            text_models.append((model, cfg['label_map']))
-            text_tokenizers.append(tokenizer)
-
-        else:  # speech
-            if cfg['name'] == 'hubert':
-                feat_extractor = Wav2Vec2FeatureExtractor.from_pretrained(cfg['model_name'])
-                mod = Wav2Vec2ForSequenceClassification.from_pretrained(
-                    cfg['model_name'], num_labels=len(cfg['label_map'])
-                )
-                wpath = os.path.join('models', f"{cfg['name']}_emotion.pt")
-                if os.path.exists(wpath):
-                    mod.load_state_dict(torch.load(wpath, map_location='cpu'), strict=False)
-                mod.to(device).eval()
-                speech_modalities.append((mod, feat_extractor, cfg['label_map'], cfg['name']))
-
-            else:  # cnn_speech
-                cnn = CNNSpeech(len(cfg['label_map']))
-                wpath = os.path.join('models', f"{cfg['name']}_emotion.pt")
-                if os.path.exists(wpath):
-                    cnn.load_state_dict(torch.load(wpath, map_location='cpu'))
-                cnn.to(device).eval()
-                speech_modalities.append((cnn, None, cfg['label_map'], cfg['name']))
-
-    return (text_models, text_tokenizers), speech_modalities
-
-# 캐시된 모델·토크나이저 불러오기
-(text_models, text_tokenizers), speech_modalities = load_ensemble()
+            mod = _convert_speech_model(mod.to(device).eval(), cfg['name'], backend)
+            speech_modalities.append((mod, feat_extractor, cfg['label_map'], cfg['name']))
+
+        else:  # cnn_speech
+            cnn = CNNSpeech(len(cfg['label_map']))
+            wpath = fetch_weights(cfg['name'], cfg['file_id'], cfg.get('sha256'))
+            cnn.load_state_dict(load_weights(wpath))
+            cnn = _convert_speech_model(cnn.to(device).eval(), cfg['name'], backend)
+            speech_modalities.append((cnn, None, cfg['label_map'], cfg['name']))
+    return speech_modalities
+
+
+@st.cache_resource
+def load_text_executor(
+    execution_mode: str = EXECUTION_MODE,
+    intra_op_threads: Optional[int] = INTRA_OP_THREADS,
+) -> Optional[ThreadPoolExecutor]:
+    """thread 모드면 텍스트 모델 동시 실행용 스레드 풀, sequential 이면 None"""
+    if execution_mode not in ("sequential", "thread"):
+        raise ValueError(f"Unknown execution_mode: {execution_mode}")
+    if execution_mode == "sequential":
+        return None
+    num_text = sum(1 for cfg in MODEL_CONFIGS if cfg['type'] == 'text')
+    # 프로세스 전체에 한 번 적용 (음성 모델 등 다른 추론에도 적용됨)
+    torch.set_num_threads(intra_op_threads or _default_intra_op_threads(num_text))
+    return _make_text_executor(num_text)
+
+
+def load_ensemble(
+    execution_mode: str = EXECUTION_MODE,
+    intra_op_threads: Optional[int] = INTRA_OP_THREADS,
+    backend: str = INFERENCE_BACKEND,
+):
+    """
+    앙상블 모델을 한 번에 모두 로드합니다.
+    execution_mode="thread" 이면 텍스트 모델들을 스레드 풀에서 동시에 실행할
+    executor 를 함께 반환하고, "sequential" 이면 None 을 반환합니다.
+    backend 는 fp32 / int8 / torchscript 중 하나입니다.
+    앱에서는 모달리티별로 처음 쓸 때 로드되므로 직접 부를 필요가 없습니다.
+    """
+    text_executor = load_text_executor(execution_mode, intra_op_threads)
+    text_models, text_tokenizers = load_text_models(backend)
+    speech_modalities = load_speech_models(backend)
+    return (text_models, text_tokenizers), speech_modalities, text_executor
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 지연 로딩: 모달리티별로 처음 쓸 때 로드 + 백그라운드 로딩 + 준비 상태
+# ─────────────────────────────────────────────────────────────────────────────
+MODALITIES = ("text", "speech")
+# 앱 시작 시 백그라운드로 미리 로드할 모달리티 (쉼표 구분, 빈 값이면 사용 안 함)
+BACKGROUND_LOAD = os.getenv("WEAKEND_BACKGROUND_LOAD", "text")
+
+_loaded: dict = {}
+_load_locks = {m: threading.Lock() for m in MODALITIES}
+_ready_events = {m: threading.Event() for m in MODALITIES}
+_background_lock = threading.Lock()
+_background_thread: Optional[threading.Thread] = None
+_background_modalities: Tuple[str, ...] = ()
+
+
+def _ensure_loaded(modality: str):
+    if modality in _loaded:
+        return _loaded[modality]
+    with _load_locks[modality]:
+        if modality not in _loaded:
+            if modality == "text":
+                text_models, text_tokenizers = load_text_models()
+                _loaded[modality] = (text_models, text_tokenizers, load_text_executor())
+            else:
+                _loaded[modality] = load_speech_models()
+            _ready_events[modality].set()
+    return _loaded[modality]
+
+
+def get_text_ensemble():
+    """(text_models, text_tokenizers, text_executor) — 처음 호출 시 로드"""
+    return _ensure_loaded("text")
+
+
+def get_speech_ensemble():
+    """[(model, processor or None, label_map, name), ...] — 처음 호출 시 로드"""
+    return _ensure_loaded("speech")
+
+
+def install_ensemble(text=None, speech=None) -> None:
+    """
+    이미 만든 모델을 지연 로딩 상태에 직접 넣습니다 (벤치마크·오프라인 점검용).
+    text: (text_models, text_tokenizers, text_executor), speech: [(model, proc, label_map, name), ...]
+    """
+    for modality, payload in (("text", text), ("speech", speech)):
+        if payload is None:
+            continue
+        with _load_locks[modality]:
+            _loaded[modality] = payload
+            _ready_events[modality].set()
+
+
+def start_background_loading(modalities: Optional[Tuple[str, ...]] = None) -> Optional[threading.Thread]:
+    """
+    백그라운드 스레드에서 모델 로드를 시작합니다. 이미 로딩 중이면 그 스레드를 반환합니다.
+    modalities 를 생략하면 WEAKEND_BACKGROUND_LOAD 설정을 따릅니다.
+    """
+    global _background_thread, _background_modalities
+    if modalities is None:
+        modalities = tuple(m.strip() for m in BACKGROUND_LOAD.split(",") if m.strip())
+    for m in modalities:
+        if m not in MODALITIES:
+            raise ValueError(f"Unknown modality: {m}")
+    modalities = tuple(m for m in modalities if m not in _loaded)
+    if not modalities:
+        return None
+
+    def _run():
+        for m in modalities:
+            try:
+                _ensure_loaded(m)
+            except Exception as e:
+                print(f"[Warning] background {m} model loading failed: {e}")
+
+    with _background_lock:
+        if _background_thread is None or not _background_thread.is_alive():
+            _background_modalities = modalities
+            _background_thread = threading.Thread(target=_run, name="model-loader", daemon=True)
+            _background_thread.start()
+        return _background_thread
+
+
+def is_ready(modality: str = "text") -> bool:
+    return _ready_events[modality].is_set()
+
+
+def wait_until_ready(modality: str = "text", timeout: Optional[float] = None) -> bool:
+    """
+    모달리티가 준비될 때까지 기다립니다. 준비되면 True, 로드 실패·타임아웃이면 False.
+    백그라운드에서 로딩 중이 아니면 이 자리에서 바로 로드합니다.
+    """
+    thread = _background_thread
+    if thread is None or not thread.is_alive() or modality not in _background_modalities:
+        try:
+            _ensure_loaded(modality)
+        except Exception as e:
+            print(f"[Warning] {modality} model loading failed: {e}")
+        return is_ready(modality)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not _ready_events[modality].wait(0.1):
+        if not thread.is_alive():
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+    return is_ready(modality)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 예측: 하드 보팅 + 분기 처리
 # ─────────────────────────────────────────────────────────────────────────────
+def _label_and_confidence(logits: torch.Tensor, label_map, offset: int = 0) -> Tuple[str, float]:
+    """1차원 logits → (라벨, softmax 확률). HuBERT 는 index+1 이 label_map 키"""
+    probs = torch.softmax(logits.flatten().float(), dim=-1)
+    idx = int(torch.argmax(probs).item())
+    return label_map[idx + offset], float(probs[idx])
+
+
+def _score_text(model, label_map, tokenizer, text: str) -> Tuple[str, float]:
+    name = _model_name(model)
+    with trace(f"inference.tokenize.{name}"):
+        inp = tokenizer(text, return_tensors='pt', padding=True, truncation=True, max_length=128)
+        inp = inp.to(_model_device(model))
+    with trace(f"inference.forward.{name}"), torch.no_grad():
+        logits = model(**inp).logits
+    return _label_and_confidence(logits[0], label_map)
+
+
+def _predict_text_label(model, label_map, tokenizer, text: str) -> str:
+    return _score_text(model, label_map, tokenizer, text)[0]
+
+
+def _batched_mean_logits(run, windows: list, batch_size: int) -> torch.Tensor:
+    """윈도우를 batch_size 개씩 모델에 넣고 윈도우별 logits 평균 (메모리는 배치 크기로 제한)"""
+    total = None
+    for start in range(0, len(windows), batch_size):
+        with torch.no_grad():
+            logits = run(windows[start:start + batch_size])
+        part = logits.sum(dim=0)
+        total = part if total is None else total + part
+    return total / len(windows)
+
+
+def _speech_logits_windowed(model, proc, name: str, clip: AudioClip) -> torch.Tensor:
+    device = _model_device(model)
+    if name == 'hubert':
+        y = clip.at(HUBERT_SR)
+        win, hop = int(AUDIO_WINDOW_SEC * HUBERT_SR), int(AUDIO_HOP_SEC * HUBERT_SR)
+        windows = [y[a:a + win] for a in _window_starts(len(y), win, hop)]
+
+        def run(batch):
+            inputs = proc(batch, sampling_rate=HUBERT_SR, return_tensors='pt', padding=True)
+            return model(input_values=inputs['input_values'].to(device)).logits
+    else:  # cnn
+        windows = get_mel_windows(clip)
+
+        def run(batch):
+            x = torch.tensor(np.stack(batch), dtype=torch.float32).unsqueeze(1).to(device)
+            return model(x)
+
+    return _batched_mean_logits(run, windows, AUDIO_WINDOW_BATCH)
+
+
+def _speech_logits(model, proc, name: str, clip: AudioClip) -> torch.Tensor:
+    with trace(f"inference.forward.{name}"):
+        if AUDIO_WINDOWED:
+            return _speech_logits_windowed(model, proc, name, clip)
+        return _speech_logits_whole(model, proc, name, clip)
+
+
+def _speech_logits_whole(model, proc, name: str, clip: AudioClip) -> torch.Tensor:
+    device = _model_device(model)
+    if name == 'hubert':
+        inputs = proc(clip.at(HUBERT_SR), sampling_rate=HUBERT_SR, return_tensors='pt')
+        input_values = inputs['input_values'].to(device)
+        with torch.no_grad():
+            logits = model(input_values=input_values).logits
+    else:  # cnn
+        S = get_mel_spectrogram(clip)
+        x = torch.tensor(S, dtype=torch.float32).unsqueeze(0).unsqueeze(0).to(device)
+        with torch.no_grad():
+            logits = model(x)
+    return logits[0]
+
+
+def _score_speech(model, proc, label_map, name: str, clip: AudioClip) -> Tuple[str, float]:
+    offset = 1 if name == 'hubert' else 0
+    return _label_and_confidence(_speech_logits(model, proc, name, clip), label_map, offset)
+
+
+def _predict_speech_label(model, proc, label_map, name: str, clip: AudioClip) -> str:
+    return _score_speech(model, proc, label_map, name, clip)[0]
+
+
+def _run_text_models(fn, *args) -> list:
+    """텍스트 모델마다 fn(model, label_map, tokenizer, *args) 실행 (모델 순서 유지)"""
+    text_models, text_tokenizers, text_executor = get_text_ensemble()
+    jobs = [(model, label_map, tokenizer)
+            for (model, label_map), tokenizer in zip(text_models, text_tokenizers)]
+    if text_executor is None:
+        return [fn(*job, *args) for job in jobs]
+    futures = [text_executor.submit(fn, *job, *args) for job in jobs]
+    return [f.result() for f in futures]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 예측 결과 캐시: (정규화 텍스트, 음성 해시, 모델 버전) → (label, score)
+# ─────────────────────────────────────────────────────────────────────────────
+# 메모리 LRU 크기 (0 이면 메모리 캐시 끔), 디스크 저장 경로 (빈 값이면 디스크 캐시 끔)
+PREDICTION_CACHE_SIZE = int(os.getenv("WEAKEND_PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_PATH = os.getenv("WEAKEND_PREDICTION_CACHE_PATH", "")
+
+MODEL_SET_VERSION = model_set_version(
+    MODEL_CONFIGS, INFERENCE_BACKEND,
+    AUDIO_WINDOWED and (AUDIO_WINDOW_SEC, AUDIO_HOP_SEC),
+)
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_PATH or None)
+
+
 def predict_emotion_with_score(
     text: Optional[str] = None,
-    audio_path: Optional[str] = None
+    audio_path: Optional[str] = None,
+    audio: Optional[AudioClip] = None,
+    cascade: Optional[bool] = None
+) -> Tuple[str, float]:
+    """
+    텍스트·음성 앙상블 하드 보팅 결과 (label, score).
+    음성은 파일 경로(audio_path) 또는 이미 디코딩한 AudioClip(audio) 으로 받으며,
+    한 번 디코딩한 배열을 HuBERT·CNN 이 샘플레이트별로 공유합니다.
+    cascade=True 면 predict_emotion_cascade 로 필요한 모델만 실행합니다 (생략 시 WEAKEND_CASCADE).
+    """
+    with trace("inference.predict"):
+        return _predict_emotion_cached(text, audio_path, audio, CASCADE if cascade is None else cascade)
+
+
+def _predict_emotion_cached(
+    text: Optional[str], audio_path: Optional[str], audio: Optional[AudioClip], cascade: bool
+) -> Tuple[str, float]:
+    if audio is None and audio_path:
+        audio = AudioClip.from_path(audio_path)
+
+    def _predict():
+        if cascade:
+            label, score, _ = predict_emotion_cascade(text, audio=audio)
+            return label, score
+        return _predict_emotion_uncached(text, audio)
+
+    # 직접 만든 AudioClip 처럼 원본 해시가 없으면 캐시를 쓰지 않음
+    if (not prediction_cache.enabled or not (text or audio is not None)
+            or (audio is not None and audio.content_hash is None)):
+        return _predict()
+
+    version = MODEL_SET_VERSION
+    if cascade:
+        version += f"|cascade:{CASCADE_CONFIDENCE}:{CASCADE_MIN_AGREE}"
+    key = prediction_cache.make_key(
+        version, text, audio.content_hash if audio is not None else None
+    )
+    cached = prediction_cache.get(key)
+    if cached is not None:
+        return cached
+    result = _predict()
+    prediction_cache.put(key, result)
+    return result
+
+
+def _predict_emotion_uncached(
+    text: Optional[str] = None,
+    audio: Optional[AudioClip] = None
 ) -> Tuple[str, float]:
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     votes = []
 
     # 텍스트 모델 예측
     if text:
-        for (model, label_map), tokenizer in zip(text_models, text_tokenizers):
-            inp = tokenizer(text, return_tensors='pt', padding=True, truncation=True, max_length=128).to(device)
-            with torch.no_grad():
-                logits = model(**inp).logits
-            idx = int(torch.argmax(logits, dim=-1).item())
-            votes.append(label_map[idx])
+        votes.extend(_run_text_models(_predict_text_label, text))
 
     # 음성 모델 예측
-    if audio_path:
-        for model, proc, label_map, name in speech_modalities:
-            if name == 'hubert':
-                audio, sr = sf.read(audio_path)
-                inputs = proc(audio, sampling_rate=sr, return_tensors='pt')
-                input_values = inputs['input_values'].to(device)
-                with torch.no_grad():
-                    logits = model(input_values=input_values).logits
-                idx = int(torch.argmax(logits, dim=-1).item()) + 1
-                votes.append(label_map[idx])
-            else:  # cnn
-                S = get_mel_spectrogram(audio_path)
-                x = torch.tensor(S, dtype=torch.float32).unsqueeze(0).unsqueeze(0).to(device)
-                with torch.no_grad():
-                    logits = model(x)
-                idx = int(torch.argmax(logits, dim=-1).item())
-                votes.append(label_map[idx])
+    if audio is not None:
+        for model, proc, label_map, name in get_speech_ensemble():
+            votes.append(_predict_speech_label(model, proc, label_map, name, audio))
 
     if not votes:
         raise ValueError('텍스트 또는 음성 입력을 제공해주세요.')
 
     vote, count = Counter(votes).most_common(1)[0]
     return vote, count / len(votes)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# cascade 예측: 싼 모델부터 실행하고 결과가 정해지면 조기 종료
+# ─────────────────────────────────────────────────────────────────────────────
+_cascade_lock = threading.Lock()
+cascade_stats = {"predictions": 0, "models_evaluated": 0, "models_available": 0}
+
+
+def predict_emotion_cascade(
+    text: Optional[str] = None,
+    audio_path: Optional[str] = None,
+    audio: Optional[AudioClip] = None,
+    confidence_threshold: float = CASCADE_CONFIDENCE,
+    min_agree: int = CASCADE_MIN_AGREE,
+) -> Tuple[str, float, int]:
+    """
+    MODEL_CONFIGS 의 cost 순으로 모델을 하나씩 실행하며 하드 보팅합니다.
+    - 남은 모델이 모두 2위에 투표해도 1위가 바뀌지 않으면 중단 (전체 실행과 같은 라벨)
+    - 지금까지 모든 모델이 같은 라벨이고, min_agree 개 이상이 모두
+      confidence_threshold 이상의 확률이면 중단
+    반환값: (label, score, 실행한 모델 수). score 는 실행한 모델 중 득표 비율입니다.
+    """
+    if audio is None and audio_path:
+        audio = AudioClip.from_path(audio_path)
+
+    costs = {cfg['name']: cfg.get('cost', 1.0) for cfg in MODEL_CONFIGS}
+    text_names = [cfg['name'] for cfg in MODEL_CONFIGS if cfg['type'] == 'text']
+    steps = []  # (cost, 순서, 실행 함수)
+    if text:
+        text_models, text_tokenizers, _ = get_text_ensemble()
+        for name, (model, label_map), tokenizer in zip(text_names, text_models, text_tokenizers):
+            steps.append((costs[name], len(steps),
+                          lambda m=model, lm=label_map, tok=tokenizer: _score_text(m, lm, tok, text)))
+    if audio is not None:
+        for model, proc, label_map, name in get_speech_ensemble():
+            steps.append((costs[name], len(steps),
+                          lambda m=model, p=proc, lm=label_map, n=name: _score_speech(m, p, lm, n, audio)))
+    if not steps:
+        raise ValueError('텍스트 또는 음성 입력을 제공해주세요.')
+    # 비용이 같으면 MODEL_CONFIGS 순서 유지
+    steps.sort(key=lambda s: (s[0], s[1]))
+
+    votes = Counter()
+    confidences = {}
+    evaluated = 0
+    for _, _, step in steps:
+        label, confidence = step()
+        evaluated += 1
+        votes[label] += 1
+        confidences.setdefault(label, []).append(confidence)
+
+        remaining = len(steps) - evaluated
+        ranked = votes.most_common(2)
+        lead, lead_count = ranked[0]
+        second_count = ranked[1][1] if len(ranked) > 1 else 0
+        if lead_count > second_count + remaining:
+            break
+        if (len(votes) == 1 and lead_count >= min_agree
+                and min(confidences[lead]) >= confidence_threshold):
+            break
+
+    with _cascade_lock:
+        cascade_stats["predictions"] += 1
+        cascade_stats["models_evaluated"] += evaluated
+        cascade_stats["models_available"] += len(steps)
+
+    vote, count = votes.most_common(1)[0]
+    return vote, count / evaluated, evaluated
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 배치 예측: 길이 정렬 버킷 + 동적 패딩
+# ─────────────────────────────────────────────────────────────────────────────
+def _predict_text_labels_batch(
+    model, label_map, tokenizer, texts: List[str], batch_size: int
+) -> List[str]:
+    device = _model_device(model)
+    name = _model_name(model)
+    # 패딩 없이 한 번만 토크나이즈한 뒤, 토큰 길이 순으로 정렬해 비슷한 길이끼리 묶음
+    with trace(f"inference.tokenize_batch.{name}"):
+        enc = tokenizer(texts, truncation=True, max_length=128)
+    keys = list(enc.keys())
+    order = sorted(range(len(texts)), key=lambda i: len(enc['input_ids'][i]))
+
+    labels: List[Optional[str]] = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        # 버킷 안에서 가장 긴 문장 길이까지만 패딩 (동적 패딩)
+        inp = tokenizer.pad(
+            [{k: enc[k][i] for k in keys} for i in bucket],
+            padding='longest', return_tensors='pt'
+        ).to(device)
+        with trace(f"inference.forward_batch.{name}"), torch.no_grad():
+            logits = model(**inp).logits
+        for i, idx in zip(bucket, torch.argmax(logits, dim=-1).tolist()):
+            labels[i] = label_map[int(idx)]
+    return labels
+
+
+def predict_emotion_batch(
+    texts: List[str],
+    batch_size: int = 32
+) -> List[Tuple[str, float]]:
+    """
+    여러 문장을 한 번에 예측합니다.
+    모델마다 버킷 단위로 한 번씩만 forward 하며, 결과는 문장별로
+    predict_emotion_with_score(text) 와 같은 (label, score) 하드 보팅 값입니다.
+    """
+    if not texts:
+        return []
+    if any(not t for t in texts):
+        raise ValueError('텍스트 또는 음성 입력을 제공해주세요.')
+    if batch_size < 1:
+        raise ValueError('batch_size 는 1 이상이어야 합니다.')
+
+    # 캐시에 있는 문장은 건너뛰고, 같은 문장은 한 번만 예측
+    keys = [prediction_cache.make_key(MODEL_SET_VERSION, t) for t in texts]
+    results: dict = {}
+    if prediction_cache.enabled:
+        for key in set(keys):
+            cached = prediction_cache.get(key)
+            if cached is not None:
+                results[key] = cached
+    pending = {}
+    for key, t in zip(keys, texts):
+        if key not in results and key not in pending:
+            pending[key] = t
+
+    if pending:
+        per_model_labels = _run_text_models(
+            _predict_text_labels_batch, list(pending.values()), batch_size
+        )
+        for key, votes in zip(pending, zip(*per_model_labels)):
+            vote, count = Counter(votes).most_common(1)[0]
+            results[key] = (vote, count / len(votes))
+            if prediction_cache.enabled:
+                prediction_cache.put(key, results[key])
+
+    return [results[key] for key in keys]
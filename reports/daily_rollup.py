@@ -0,0 +1,49 @@
+import pandas as pd
+
+# 긍정/중립/부정 컬럼 순서. 가나다순이라 하루 최빈값이 동률일 때 Series.mode() 와 같은 값을 고름
+CATEGORIES = ['긍정', '부정', '중립']
+
+
+class DailyRollup:
+    """
+    사용자별 일별 감정 집계
+      by_emotion : 날짜 × 감정(middle category) 메시지 수
+      by_category: 날짜 × 긍정/부정/중립 메시지 수
+    새 메시지 행이 생기면 merge 로 해당 날짜만 더해 갱신하고, 리포트 화면은 이것만 읽습니다.
+    """
+
+    def __init__(self, by_emotion: pd.DataFrame | None = None, by_category: pd.DataFrame | None = None):
+        empty = pd.DataFrame(index=pd.DatetimeIndex([], name='date'))
+        self.by_emotion = by_emotion if by_emotion is not None else empty.copy()
+        self.by_category = (by_category if by_category is not None else empty.copy()) \
+            .reindex(columns=CATEGORIES, fill_value=0)
+
+    @classmethod
+    def from_rows(cls, df: pd.DataFrame) -> "DailyRollup":
+        """load_data 형식(date, emotion, category)의 메시지 행으로 집계"""
+        if df.empty:
+            return cls()
+        day = df['date'].dt.normalize().rename('date')
+        return cls(pd.crosstab(day, df['emotion']), pd.crosstab(day, df['category']))
+
+    def merge(self, other: "DailyRollup") -> "DailyRollup":
+        """두 집계를 더한 새 집계 (비용은 날짜 수에 비례)"""
+        def add(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+            merged = a.add(b, fill_value=0).fillna(0).astype(int).sort_index()
+            merged.index.name = 'date'
+            return merged
+        return DailyRollup(add(self.by_emotion, other.by_emotion),
+                           add(self.by_category, other.by_category))
+
+    def between(self, start, end) -> "DailyRollup":
+        """start ~ end (date, 양끝 포함) 구간만"""
+        lo, hi = pd.Timestamp(start), pd.Timestamp(end)
+        return DailyRollup(self.by_emotion.loc[lo:hi], self.by_category.loc[lo:hi])
+
+    @property
+    def days(self) -> pd.DatetimeIndex:
+        return self.by_category.index
+
+    @property
+    def empty(self) -> bool:
+        return self.by_category.empty
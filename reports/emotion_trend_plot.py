@@ -1,3 +1,7 @@
+import os
+import time
+import threading
+from collections import OrderedDict
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -5,7 +9,11 @@ import plotly.express as px
 import plotly.graph_objects as go
 import calendar
 from collections import Counter
-from reports.generate_report import get_emotion_report
+from backend.db import get_userid_by_login
+from backend.write_queue import write_queue
+from reports.generate_report import fetch_emotion_frame, create_pdf_report
+from reports.daily_rollup import DailyRollup
+from utils.tracing import trace
 
 # --- 키워드 추출 함수 ---
 def extract_keywords(texts, top_n=5):
@@ -21,34 +29,61 @@ def extract_keywords(texts, top_n=5):
 
 
 # --- 데이터 로드 및 전처리 ---
-@st.cache_data
-def load_data(login_id: str) -> pd.DataFrame:
-    """
-    DB에서 감정 로그를 가져와서 분석용 DataFrame으로 변환합니다.
-    Columns: ['date', 'emotion', 'text', 'category']
-    """
-    # 1) Supabase에서 리포트 불러오기
-    df = get_emotion_report(login_id)
-    if df.empty:
-        return pd.DataFrame()
+# 사용자별 리포트 데이터 캐시: userid → {df, rollup(일별 집계), high_water(마지막 emotion_id), dirty, checked_at}
+# 처음에만 전체를 읽고, 이후에는 high_water 이후의 새 행만 가져와 이어 붙이고 일별 집계에 더합니다.
+# 새 감정 기록이 DB에 저장되면(write-behind flush) 해당 사용자를 dirty 로 표시하고,
+# 다른 프로세스가 쓴 기록도 보이도록 REPORT_CACHE_TTL 초가 지나면 새 행을 다시 확인합니다.
+# 최근에 본 REPORT_CACHE_SIZE 명까지만 보관하고, REPORT_CACHE_IDLE_SEC 동안 보지 않은 사용자는 제거합니다.
+REPORT_CACHE_TTL = float(os.getenv("WEAKEND_REPORT_CACHE_TTL", "60"))
+REPORT_CACHE_SIZE = int(os.getenv("WEAKEND_REPORT_CACHE_SIZE", "256"))
+REPORT_CACHE_IDLE_SEC = float(os.getenv("WEAKEND_REPORT_CACHE_IDLE_SEC", "1800"))
+
+_report_cache: "OrderedDict[int, dict]" = OrderedDict()
+_report_cache_lock = threading.Lock()
+
+
+def _remember_report(user_id: int, entry: dict) -> None:
+    """캐시에 넣고 오래된 항목 정리 (_report_cache_lock 안에서 호출)"""
+    if REPORT_CACHE_SIZE <= 0:
+        return
+    now = time.monotonic()
+    entry["last_used"] = now
+    _report_cache[user_id] = entry
+    _report_cache.move_to_end(user_id)
+    while _report_cache:
+        oldest_id, oldest = next(iter(_report_cache.items()))
+        if len(_report_cache) <= REPORT_CACHE_SIZE and now - oldest["last_used"] < REPORT_CACHE_IDLE_SEC:
+            break
+        del _report_cache[oldest_id]
+
+
+def _mark_dirty(records) -> None:
+    with _report_cache_lock:
+        for r in records:
+            if r.emotion is not None and r.chat["userid"] in _report_cache:
+                _report_cache[r.chat["userid"]]["dirty"] = True
+
 
-    # 2) 컬럼명 통일 (generate_report에서 반환하는 컬럼에 맞춰 조정)
+write_queue.add_listener(_mark_dirty)
+
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """fetch_emotion_frame 결과를 분석용 컬럼으로 변환"""
+    # 1) 컬럼명 통일
     df = df.rename(columns={
         'analysis_date': 'date',
-        '분석 날짜':     'date',
         'middle_categoryname': 'emotion',
-        '감정 카테고리':        'emotion',
         'chat_content':        'text'
     })
 
-    # 3) 날짜 타입 변환
+    # 2) 날짜 타입 변환
     df['date'] = pd.to_datetime(df['date'])
 
-    # 4) 텍스트 컬럼 보장
+    # 3) 텍스트 컬럼 보장
     if 'text' not in df.columns:
         df['text'] = ''
 
-    # 5) 긍정/중립/부정 카테고리 매핑
+    # 4) 긍정/중립/부정 카테고리 매핑
     df['category'] = df['emotion'].apply(
         lambda e: '긍정' if e=='긍정'
                   else ('중립' if e=='중립' else '부정')
@@ -56,18 +91,110 @@ def load_data(login_id: str) -> pd.DataFrame:
     return df
 
 
+def load_report(login_id: str) -> tuple[pd.DataFrame, DailyRollup]:
+    """
+    DB에서 감정 로그를 가져와 (분석용 DataFrame, 일별 집계)를 반환합니다. (사용자별 증분 캐시)
+    DataFrame columns: ['emotion_id', 'date', 'emotion', 'emotion_score', 'text', 'category']
+    """
+    user_id = get_userid_by_login(login_id)
+    if user_id is None:
+        return pd.DataFrame(), DailyRollup()
+
+    with _report_cache_lock:
+        entry = _report_cache.get(user_id)
+        fresh = entry is not None and not entry["dirty"] \
+            and time.monotonic() - entry["checked_at"] < REPORT_CACHE_TTL
+        if fresh:
+            entry["last_used"] = time.monotonic()
+            _report_cache.move_to_end(user_id)
+            return _result(entry)
+        if entry is not None:
+            entry["dirty"] = False    # 가져오는 동안 새로 저장된 기록은 다시 dirty 로 표시됨
+        high_water = entry["high_water"] if entry is not None else 0
+
+    try:
+        with trace("report.load_data"):
+            new = _prepare(fetch_emotion_frame(user_id, high_water))
+    except Exception:
+        if entry is not None:
+            entry["dirty"] = True
+        raise
+
+    with _report_cache_lock:
+        entry = _report_cache.get(user_id)
+        if entry is not None and entry["high_water"] != high_water:
+            return _result(entry)     # 다른 스레드가 먼저 갱신함
+        df, rollup = (entry["df"], entry["rollup"]) if entry is not None else (new, DailyRollup())
+        if entry is not None and not new.empty:
+            df = pd.concat([df, new], ignore_index=True)
+        if not new.empty:
+            df = df.sort_values('date', kind='stable').reset_index(drop=True)
+            rollup = rollup.merge(DailyRollup.from_rows(new))
+        updated = {
+            "df": df,
+            "rollup": rollup,
+            "high_water": int(new["emotion_id"].max()) if not new.empty else high_water,
+            "dirty": entry["dirty"] if entry is not None else False,
+            "checked_at": time.monotonic(),
+        }
+        if entry is not None and "pdf" in entry:
+            updated["pdf"] = entry["pdf"]    # 버전(high_water)이 바뀌면 report_pdf 가 다시 만듦
+        _remember_report(user_id, updated)
+    return _result(updated)
+
+
+def _result(entry: dict) -> tuple[pd.DataFrame, DailyRollup]:
+    df = entry["df"]
+    return (df if not df.empty else pd.DataFrame()), entry["rollup"]
+
+
+def load_data(login_id: str) -> pd.DataFrame:
+    """분석용 DataFrame 만 반환 (load_report 참고)"""
+    return load_report(login_id)[0]
+
+
+def report_pdf(login_id: str) -> bytes:
+    """
+    캐시된 리포트 데이터로 만든 PDF. 사용자별로 데이터 버전(high_water)이 같으면
+    전에 만든 PDF 를 그대로 돌려줍니다.
+    """
+    df, _ = load_report(login_id)
+    user_id = get_userid_by_login(login_id)
+    with _report_cache_lock:
+        entry = _report_cache.get(user_id)
+        version = entry["high_water"] if entry is not None else None
+        cached = entry.get("pdf") if entry is not None else None
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    # generate_report.get_emotion_report 와 같은 컬럼으로 맞춰서 PDF 생성
+    report_df = pd.DataFrame({
+        "분석 날짜":   df["date"].dt.date,
+        "감정 카테고리": df["emotion"],
+        "감정 확신도":  df["emotion_score"],
+    }) if not df.empty else pd.DataFrame()
+    pdf = create_pdf_report(login_id, report_df)
+
+    with _report_cache_lock:
+        entry = _report_cache.get(user_id)
+        if entry is not None and entry["high_water"] == version:
+            entry["pdf"] = (version, pdf)
+    return pdf
+
+
 
 
 
 # --- 대시보드: Plotly Pie 차트 + 메트릭 ---
-def render_dashboard(df: pd.DataFrame):
-    if df.empty:
+def render_dashboard(daily: DailyRollup):
+    if daily.empty:
         st.info("분석할 감정 데이터가 없습니다.")
         return
+    totals = daily.by_category.sum()
     
 
     # 1) 최빈 감정 → score (1~3)
-    mood      = df['category'].mode().iloc[0]
+    mood      = totals.idxmax()
     score_map = {'부정':1, '중립':2, '긍정':3}
     val       = score_map[mood]
 
@@ -131,7 +258,7 @@ def render_dashboard(df: pd.DataFrame):
     st.plotly_chart(fig, use_container_width=False)
 
     # 6) 긍정/중립/부정 비율 메트릭
-    counts = df['category'].value_counts(normalize=True).mul(100).round(1)
+    counts = totals.div(totals.sum()).mul(100).round(1)
     c1, c2, c3 = st.columns(3)
     c1.metric("😊 긍정", f"{counts.get('긍정',0)}%")
     c2.metric("😐 중립", f"{counts.get('중립',0)}%")
@@ -144,8 +271,8 @@ def render_dashboard(df: pd.DataFrame):
 
 
 # --- 감정 트렌드: Plotly Line 차트 ---
-def render_trend(df: pd.DataFrame):
-    dates = df['date'].dt.date
+def render_trend(daily: DailyRollup, df: pd.DataFrame | None = None):
+    dates = daily.days.date
     min_d, max_d = dates.min(), dates.max()
     c1, c2 = st.columns(2)
     with c1:
@@ -155,16 +282,17 @@ def render_trend(df: pd.DataFrame):
     if start > end:
         st.error('시작일이 종료일보다 클 수 없습니다.'); return
 
-    df_f = df[(df['date'].dt.date >= start)&(df['date'].dt.date <= end)].copy()
-    if df_f.empty:
+    daily_f = daily.between(start, end)
+    if daily_f.empty:
         st.warning('선택한 기간에 데이터가 없습니다.'); return
 
     freq = st.radio('조회기준', ['일별','주별','월별'], horizontal=True)
 
     if freq == '일별':
-        today    = df_f['date'].dt.date.max()
-        df_today = df_f[df_f['date'].dt.date==today]
-        counts   = df_today['emotion'].value_counts(normalize=True).mul(100).round(1)
+        today    = daily_f.days.max()
+        day_cnt  = daily_f.by_emotion.loc[today] if today in daily_f.by_emotion.index else pd.Series(dtype=int)
+        day_cnt  = day_cnt[day_cnt > 0].sort_values(ascending=False)
+        counts   = day_cnt.div(day_cnt.sum()).mul(100).round(1)
         if counts.empty:
             st.info("오늘의 감정 데이터가 없습니다."); return
 
@@ -175,8 +303,8 @@ def render_trend(df: pd.DataFrame):
         fig.update_traces(textinfo='percent+label')
         st.plotly_chart(fig, use_container_width=False)
 
-        # 오늘의 주요 키워드
-        texts = df_today['text'].tolist()
+        # 오늘의 주요 키워드 (메시지 원문은 해당 날짜 행만)
+        texts = df.loc[df['date'].dt.normalize()==today, 'text'].tolist() if df is not None else []
         top_kw = extract_keywords(texts, top_n=5)
         st.subheader("📌 오늘의 주요 키워드")
         for kw, cnt in top_kw:
@@ -184,15 +312,17 @@ def render_trend(df: pd.DataFrame):
 
         return
 
+    days = daily_f.by_emotion.index
     if freq == '주별':
-        df_f['period'] = df_f['date'] - pd.to_timedelta(df_f['date'].dt.weekday, unit='d')
+        period = days - pd.to_timedelta(days.weekday, unit='d')
         title = '▶ 주차별 감정 흐름'
     else:
-        df_f['period'] = df_f['date'].dt.to_period('M').dt.to_timestamp()
+        period = days.to_period('M').to_timestamp()
         title = '▶ 월별 감정 흐름'
 
-    agg   = df_f.groupby(['period','emotion']).size().reset_index(name='count')
-    pivot = agg.pivot(index='period', columns='emotion', values='count').fillna(0)
+    pivot = daily_f.by_emotion.groupby(period.rename('period')).sum()
+    pivot = pivot.loc[:, pivot.sum() > 0]
+    pivot.columns.name = None
     ratio = pivot.div(pivot.sum(axis=1), axis=0)
     long_df = ratio.reset_index().melt(id_vars='period', var_name='emotion', value_name='ratio')
 
@@ -208,17 +338,18 @@ def render_trend(df: pd.DataFrame):
 
 
 # --- 감정 달력 ---
-def render_calendar(df: pd.DataFrame):
-    years = sorted(df['date'].dt.year.unique())
+def render_calendar(daily: DailyRollup):
+    days  = daily.days
+    years = sorted(days.year.unique())
     year  = st.selectbox('연도 선택', years, index=len(years)-1)
     months = list(range(1, 13))
-    last_month = int(df['date'].dt.month.max())
+    last_month = int(days.month.max())
     default_idx = months.index(last_month) if last_month in months else 0
     month = st.selectbox('월 선택', months, index=default_idx)
 
-    df_m  = df[(df['date'].dt.year==year)&(df['date'].dt.month==month)]
-    dom   = df_m.groupby(df_m['date'].dt.day)['category']\
-                .agg(lambda s: s.mode().iloc[0] if not s.mode().empty else '')
+    cat_m = daily.by_category[(days.year==year)&(days.month==month)]
+    cat_m = cat_m[cat_m.sum(axis=1) > 0]
+    dom   = pd.Series(cat_m.idxmax(axis=1).values, index=cat_m.index.day)
     emap = {'긍정':'😊','중립':'😐','부정':'☹️'}
     cal  = calendar.Calendar(firstweekday=6).monthdayscalendar(year,month)
     cal_df = pd.DataFrame(cal, columns=['Sun','Mon','Tue','Wed','Thu','Fri','Sat'])
@@ -234,9 +365,9 @@ def render_calendar(df: pd.DataFrame):
 
 
 # --- 맞춤 알림 ---
-def render_alert(df: pd.DataFrame):
-    daily = df.groupby(df['date'].dt.date)['category']\
-              .apply(lambda s:(s=='부정').mean())\
+def render_alert(rollup: DailyRollup):
+    cats  = rollup.by_category
+    daily = cats['부정'].div(cats.sum(axis=1))\
               .reset_index(name='neg_ratio')
     if daily.empty:
         st.info('알림 데이터가 없습니다.'); return
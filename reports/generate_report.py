@@ -4,68 +4,83 @@ import os
 import io
 from datetime import datetime
 import pandas as pd
-from supabase import create_client
-from dotenv import load_dotenv
 from reportlab.platypus import SimpleDocTemplate, Table, Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
+from utils.tracing import trace, traced
+from backend.db import get_userid_by_login
+from backend.storage import storage
+from backend.categories import middle_category_names
 
+# 한 번에 가져오는 emotions 행 수 (Supabase 기본 max-rows 이하로)
+REPORT_PAGE_SIZE = int(os.getenv("WEAKEND_REPORT_PAGE_SIZE", "1000"))
+
+
+def iter_emotion_pages(user_id: int, after_emotion_id: int = 0, page_size: int = REPORT_PAGE_SIZE):
+    """
+    userid 의 emotions 행을 emotion_id 오름차순으로 page_size 개씩 돌려줍니다.
+    emotions ⋈ chat_log 를 userid 로 걸러 한 페이지가 한 번의 요청이며,
+    다음 페이지는 마지막 emotion_id 이후부터(keyset) 가져와 기록이 많아도 요청 크기가 일정합니다.
+    """
+    last_id = after_emotion_id
+    while True:
+        with trace("db.emotions.select_page"):
+            rows = storage.emotion_page(user_id, last_id, page_size)
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["emotion_id"]
+        if len(rows) < page_size:
+            return
+
+
+def _rows_to_frame(rows: list) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["emotion_id", "analysis_date", "emotion_score", "middle_category_id"])
+    df["analysis_date"] = pd.to_datetime(df["analysis_date"]).dt.date
+    df["middle_categoryname"] = df["middle_category_id"].map(middle_category_names())
+    return df[["emotion_id", "analysis_date", "middle_categoryname", "emotion_score"]]
+
+
+def fetch_emotion_frame(user_id: int, after_emotion_id: int = 0) -> pd.DataFrame:
+    """
+    after_emotion_id 이후의 emotions 를 DataFrame(emotion_id, analysis_date, middle_categoryname, emotion_score)
+    으로 반환합니다. 페이지 단위로 받아 바로 DataFrame 조각으로 변환합니다.
+    """
+    frames = [_rows_to_frame(rows) for rows in iter_emotion_pages(user_id, after_emotion_id)]
+    if not frames:
+        return _rows_to_frame([])
+    return pd.concat(frames, ignore_index=True)
+
+
+@traced("report.get_emotion_report")
 def get_emotion_report(login_id: str) -> pd.DataFrame:
     """
-    login_id 로 users → chat_log → emotions 를 조회해,
+    login_id 의 감정 분석 기록을
     pandas.DataFrame(컬럼: 분석 날짜, 감정 카테고리, 감정 확신도)으로 반환합니다.
     """
-    load_dotenv()
-    url = os.getenv("SUPABASE_URL")
-    key = os.getenv("SUPABASE_KEY")
-    supabase = create_client(url, key)
-
-    # 1) userid 조회
-    user = supabase.table("users") \
-        .select("userid") \
-        .eq("login_id", login_id) \
-        .single().execute()
-    if not user.data:
-        return pd.DataFrame()
-    user_id = user.data["userid"]
-
-    # 2) chat_log → chat_id 리스트
-    logs = supabase.table("chat_log") \
-        .select("chat_id") \
-        .eq("userid", user_id) \
-        .execute().data or []
-    chat_ids = [r["chat_id"] for r in logs]
-    if not chat_ids:
+    # 1) userid 조회 (로그인 시 채워진 공용 캐시 사용)
+    user_id = get_userid_by_login(login_id)
+    if user_id is None:
         return pd.DataFrame()
 
-    # 3) emotions 테이블 조회
-    em = supabase.table("emotions") \
-        .select("analysis_date, emotion_score, middle_category_id") \
-        .in_("chat_id", chat_ids) \
-        .order("analysis_date", desc=False) \
-        .execute().data or []
-    df = pd.DataFrame(em)
+    # 2) emotions ⋈ chat_log 조회
+    df = fetch_emotion_frame(user_id)
     if df.empty:
-        return df
-
-    # 4) 날짜 및 카테고리 매핑
-    df["analysis_date"] = pd.to_datetime(df["analysis_date"]).dt.date
-    cats = supabase.table("middle_categories") \
-        .select("middle_category_id, middle_categoryname") \
-        .execute().data or []
-    cat_df = pd.DataFrame(cats)
-    df = df.merge(cat_df, on="middle_category_id", how="left")
+        return pd.DataFrame()
 
-    # 5) 컬럼 정리 및 한글명 변경
+    # 3) 날짜순 정렬 및 한글 컬럼명
+    df = df.sort_values("analysis_date", kind="stable").reset_index(drop=True)
     df = df[["analysis_date", "middle_categoryname", "emotion_score"]]
     df.columns = ["분석 날짜", "감정 카테고리", "감정 확신도"]
     return df
 
-def create_pdf_report(login_id: str) -> bytes:
+@traced("report.create_pdf")
+def create_pdf_report(login_id: str, df: pd.DataFrame | None = None) -> bytes:
     """
-    get_emotion_report() 결과를 reportlab 으로 PDF로 만들어
+    get_emotion_report() 결과(이미 불러온 df 가 있으면 그것)를 reportlab 으로 PDF로 만들어
     바이트로 반환합니다.
     """
-    df = get_emotion_report(login_id)
+    if df is None:
+        df = get_emotion_report(login_id)
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer)
     styles = getSampleStyleSheet()
@@ -0,0 +1,53 @@
+import io
+import hashlib
+from typing import Dict, Optional
+
+import numpy as np
+import soundfile as sf
+import librosa
+
+from utils.tracing import trace
+
+
+class AudioClip:
+    """
+    한 번만 디코딩한 음성 데이터.
+    모델마다 필요한 샘플레이트(HuBERT 16 kHz, CNN 22.05 kHz)로의 리샘플 결과를
+    캐시해 두고 여러 모델·음성 인식이 같은 배열을 공유합니다.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int, content_hash: Optional[str] = None):
+        self.samples = samples            # mono float32, [-1, 1]
+        self.sample_rate = sample_rate
+        self.content_hash = content_hash  # 원본 바이트의 sha256 (예측 캐시 키)
+        self._resampled: Dict[int, np.ndarray] = {sample_rate: samples}
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "AudioClip":
+        """업로드된 파일 바이트를 메모리에서 바로 디코딩 (임시 파일 없음)"""
+        with trace("audio.decode"):
+            samples, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+            mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+            return cls(np.ascontiguousarray(mono), sr, hashlib.sha256(data).hexdigest())
+
+    @classmethod
+    def from_path(cls, path: str) -> "AudioClip":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def at(self, sample_rate: int) -> np.ndarray:
+        """sample_rate 로 리샘플한 배열 (샘플레이트별로 한 번만 계산)"""
+        if sample_rate not in self._resampled:
+            with trace(f"audio.resample.{sample_rate}"):
+                self._resampled[sample_rate] = librosa.resample(
+                    self.samples, orig_sr=self.sample_rate, target_sr=sample_rate
+                )
+        return self._resampled[sample_rate]
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def to_pcm16(self) -> bytes:
+        """speech_recognition.AudioData 용 16-bit PCM 바이트"""
+        return (np.clip(self.samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
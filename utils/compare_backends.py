@@ -0,0 +1,103 @@
+"""
+추론 백엔드 정확도 비교 스크립트
+
+fp32 앙상블과 선택한 백엔드(int8 / torchscript)로 같은 샘플을 예측해
+모델별·앙상블 투표 일치율을 출력합니다.
+
+    python -m utils.compare_backends --backend int8
+    python -m utils.compare_backends --backend torchscript --texts samples.txt --audio a.wav b.wav
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+
+import inference
+from utils.audio import AudioClip
+
+# 샘플 파일을 주지 않았을 때 쓰는 기본 문장
+DEFAULT_TEXTS = [
+    "오늘 너무 힘들어",
+    "괜찮아, 별일 아니야",
+    "친구들이 나만 빼고 놀러 갔어",
+    "시험 결과가 나올 때까지 너무 불안해",
+    "왜 자꾸 나한테만 이런 일이 생기는지 화가 나",
+    "오랜만에 가족이랑 맛있는 저녁을 먹었어",
+    "갑자기 길에서 넘어져서 너무 창피했어",
+    "밤길에 누가 따라오는 것 같아서 무서웠어",
+    "그냥 평범한 하루였어",
+    "요즘 아무것도 하기 싫고 계속 눈물이 나",
+]
+
+
+def _vote(labels):
+    return Counter(labels).most_common(1)[0][0]
+
+
+def _predict_all(ensemble, texts, audio_paths):
+    """모델별 예측 라벨 {모델명: [라벨, ...]} 과 샘플별 앙상블 투표, 소요 시간(초) 반환"""
+    (text_models, text_tokenizers), speech_modalities, _ = ensemble
+    text_names = [c['name'] for c in inference.MODEL_CONFIGS if c['type'] == 'text']
+    per_model = {}
+
+    clips = [AudioClip.from_path(p) for p in audio_paths]
+    start = time.perf_counter()
+    for name, (model, label_map), tokenizer in zip(text_names, text_models, text_tokenizers):
+        per_model[name] = [
+            inference._predict_text_label(model, label_map, tokenizer, t) for t in texts
+        ]
+    for model, proc, label_map, name in speech_modalities:
+        per_model[name] = [
+            inference._predict_speech_label(model, proc, label_map, name, c) for c in clips
+        ]
+    elapsed = time.perf_counter() - start
+
+    text_votes = [_vote(v) for v in zip(*(per_model[n] for n in text_names))]
+    speech_names = [m[3] for m in speech_modalities]
+    speech_votes = [_vote(v) for v in zip(*(per_model[n] for n in speech_names))] if audio_paths else []
+    return per_model, text_votes + speech_votes, elapsed
+
+
+def _agreement(a, b) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a) if a else 1.0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="fp32 앙상블 대비 추론 백엔드 투표 일치율 확인")
+    parser.add_argument("--backend", choices=[b for b in inference.BACKENDS if b != "fp32"], required=True)
+    parser.add_argument("--texts", help="한 줄에 한 문장씩 적힌 샘플 텍스트 파일")
+    parser.add_argument("--audio", nargs="*", default=[], help="비교할 음성 파일 경로들")
+    parser.add_argument("--min-agreement", type=float, default=0.95,
+                        help="앙상블 일치율이 이 값보다 낮으면 종료 코드 1")
+    args = parser.parse_args(argv)
+
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = DEFAULT_TEXTS
+
+    reference = inference.load_ensemble(backend="fp32")
+    candidate = inference.load_ensemble(backend=args.backend)
+
+    ref_models, ref_votes, ref_time = _predict_all(reference, texts, args.audio)
+    cand_models, cand_votes, cand_time = _predict_all(candidate, texts, args.audio)
+
+    print(f"samples: text={len(texts)} audio={len(args.audio)}")
+    for name, ref_labels in ref_models.items():
+        if ref_labels:
+            print(f"  {name:<12} agreement={_agreement(ref_labels, cand_models[name]):.3f}")
+    ensemble_agreement = _agreement(ref_votes, cand_votes)
+    print(f"  {'ensemble':<12} agreement={ensemble_agreement:.3f}")
+    print(f"time: fp32={ref_time:.2f}s {args.backend}={cand_time:.2f}s")
+
+    samples = texts + list(args.audio)
+    for sample, r, c in zip(samples, ref_votes, cand_votes):
+        if r != c:
+            print(f"  mismatch: {sample!r} fp32={r} {args.backend}={c}")
+
+    return 0 if ensemble_agreement >= args.min_agreement else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,51 +1,134 @@
 import os
-import torch
-import gdown
+import threading
+from contextlib import contextmanager
+from typing import Optional
+import torch.nn as nn
 import streamlit as st
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
+from utils.model_store import MODEL_STORE_DIR, fetch_weights, load_weights
+
+# 허브 접근 없이 로컬 파일만 사용 (에어갭 노드용)
+OFFLINE = os.getenv("WEAKEND_OFFLINE", "") == "1"
+# 레포에 커밋된 config / tokenizer 폴더
+CONFIG_DIR = "configs"
+TOKENIZER_DIR = "tokenizers"
+
+
+def _local_dirs(kind: str, safe_name: str):
+    # 레포에 커밋된 폴더 우선, 그다음 모델 저장소 아래 (허브에서 한 번 받아 저장해 둔 것)
+    repo_dir = CONFIG_DIR if kind == "configs" else TOKENIZER_DIR
+    return [os.path.join(repo_dir, safe_name), os.path.join(MODEL_STORE_DIR, kind, safe_name)]
+
+
+def load_config(model_name: str, num_labels: int, config_cls=AutoConfig):
+    """로컬 config.json 으로 아키텍처 설정을 만들고, 없으면 허브에서 config 만 받아 저장"""
+    safe_name = model_name.replace("/", "_")
+    for d in _local_dirs("configs", safe_name):
+        if os.path.exists(os.path.join(d, "config.json")):
+            return config_cls.from_pretrained(d, num_labels=num_labels, local_files_only=True)
+    if OFFLINE:
+        raise FileNotFoundError(f"{model_name}: 로컬 config.json 이 없습니다 (WEAKEND_OFFLINE=1)")
+    config = config_cls.from_pretrained(model_name, num_labels=num_labels)
+    config.save_pretrained(_local_dirs("configs", safe_name)[1])
+    return config
+
+
+def load_pretrained_component(cls, model_name: str):
+    """tokenizer / feature extractor 를 로컬 폴더에서 로드하고, 없으면 허브에서 받아 저장"""
+    safe_name = model_name.replace("/", "_")
+    for d in _local_dirs("tokenizers", safe_name):
+        try:
+            return cls.from_pretrained(d, local_files_only=True)
+        except Exception:
+            continue
+    if OFFLINE:
+        raise FileNotFoundError(f"{model_name}: 로컬 {cls.__name__} 파일이 없습니다 (WEAKEND_OFFLINE=1)")
+    component = cls.from_pretrained(model_name)
+    component.save_pretrained(_local_dirs("tokenizers", safe_name)[1])
+    return component
+
+
+_meta_lock = threading.Lock()
+_meta_local = threading.local()
+
+
+@contextmanager
+def _params_on_meta():
+    """
+    모듈 생성 시 파라미터만 meta 디바이스에 두어 실제 메모리를 잡지 않음 (버퍼는 그대로).
+    다른 스레드에서 동시에 만드는 모듈에는 영향을 주지 않도록 현재 스레드에만 적용합니다.
+    """
+    with _meta_lock:
+        register_parameter = nn.Module.register_parameter
+
+        def _register(module, name, param):
+            if param is not None and getattr(_meta_local, "active", False):
+                param = nn.Parameter(param.to("meta"), requires_grad=param.requires_grad)
+            register_parameter(module, name, param)
+
+        nn.Module.register_parameter = _register
+        _meta_local.active = True
+        try:
+            yield
+        finally:
+            _meta_local.active = False
+            nn.Module.register_parameter = register_parameter
+
+
+def build_model_from_state_dict(model_cls, model_name: str, num_labels: int, state_dict):
+    """
+    로컬 config 로 빈 아키텍처를 만들고 fine-tuned 가중치만 채워 넣습니다.
+    허브 체크포인트를 내려받아 덮어쓰지 않으므로 로드 중 가중치 사본은 하나뿐입니다.
+    fine-tuned 가중치로 채워지지 않는 파라미터가 있으면 예전처럼 허브 가중치 위에 덮어씁니다.
+    """
+    # Auto 클래스는 AutoConfig + from_config, 구체 클래스(Wav2Vec2...)는 자기 config_class 사용
+    is_auto = hasattr(model_cls, "from_config")
+    config = load_config(model_name, num_labels, AutoConfig if is_auto else model_cls.config_class)
+    try:
+        with _params_on_meta():
+            model = model_cls.from_config(config) if is_auto else model_cls(config)
+        # assign=True: 복사 없이 state_dict 텐서(메모리 맵)를 그대로 파라미터로 사용
+        model.load_state_dict(state_dict, strict=False, assign=True)
+        still_meta = [n for n, p in model.named_parameters() if p.is_meta]
+    except RuntimeError as e:
+        print(f"[Warning] {model_name}: 로컬 config 로 가중치를 채우지 못했습니다 ({e})")
+        still_meta = ["*"]
+
+    if still_meta:
+        if OFFLINE:
+            raise RuntimeError(f"{model_name}: fine-tuned 가중치에 없는 파라미터가 있습니다: {still_meta[:5]}")
+        model = model_cls.from_pretrained(model_name, config=config)
+        model.load_state_dict(state_dict, strict=False)
+    return model.eval()
+
 
 # @st.cache_resource
 def load_model_and_tokenizer_from_drive(
     file_id: str,
     model_name: str = 'monologg/koelectra-base-discriminator',
-    num_labels: int = 8
+    num_labels: int = 8,
+    name: Optional[str] = None,
+    sha256: Optional[str] = None
 ):
     """
-    1) Google Drive에서 fine-tuned .pt 모델 파일을 다운로드
+    1) 로컬 모델 저장소에서 fine-tuned 가중치를 가져옴 (없으면 Google Drive에서 다운로드)
+       - name 별로 따로 저장되므로 모델끼리 가중치를 공유하지 않음
     2) 로컬에 커밋된 tokenizer 폴더에서 토크나이저를 우선 로드, 실패 시 HF Hub fetch
-    3) 허브에서 base 모델 불러오기
-    4) fine-tuned 가중치 덮어씌우기
+    3) 로컬 config 로 base 아키텍처 생성 (허브 가중치는 받지 않음)
+    4) fine-tuned 가중치 채워 넣기
     """
-    # 1) weights 파일
-    dest_dir = "models"
-    os.makedirs(dest_dir, exist_ok=True)
-    weights_path = os.path.join(dest_dir, "koelectra_emotion.pt")
-    if not os.path.exists(weights_path):
-        url = f"https://drive.google.com/uc?id={file_id}"
-        with st.spinner("📥 감정 모델 다운로드 중…"):
-            gdown.download(url, weights_path, quiet=False)
+    # 1) weights 파일 (모델 이름 + 체크섬 단위로 저장)
+    safe_name = model_name.replace("/", "_")
+    with st.spinner("📥 감정 모델 준비 중…"):
+        weights_path = fetch_weights(name or safe_name, file_id, sha256)
 
     # 2) tokenizer: 로컬 커밋 폴더 우선, 없으면 허브에서
-    safe_name = model_name.replace("/", "_")
-    tokenizer_dir = os.path.join(dest_dir, "tokenizers", safe_name)
-    try:
-        tokenizer = AutoTokenizer.from_pretrained(
-            tokenizer_dir,
-            local_files_only=True
-        )
-    except Exception:
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-
-    # 3) base 모델 로드 (허브 fetch 필요)
-    model = AutoModelForSequenceClassification.from_pretrained(
-        model_name,
-        num_labels=num_labels
-    )
+    tokenizer = load_pretrained_component(AutoTokenizer, model_name)
 
-    # 4) fine-tuned weights 적용
-    state_dict = torch.load(weights_path, map_location='cpu')
-    # missing/unexpected keys 무시하고 head 부분만 덮어씌우기
-    model.load_state_dict(state_dict, strict=False)
-    model.eval()
+    # 3) + 4) 아키텍처 생성 후 fine-tuned weights 적용 (safetensors 메모리 맵 로드)
+    state_dict = load_weights(weights_path)
+    model = build_model_from_state_dict(
+        AutoModelForSequenceClassification, model_name, num_labels, state_dict
+    )
 
-    return model, tokenizer
\ No newline at end of file
+    return model, tokenizer
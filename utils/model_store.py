@@ -0,0 +1,215 @@
+"""
+로컬 모델 저장소
+
+fine-tuned 가중치를 모델 이름별·체크섬별로 저장하고 safetensors(메모리 맵)로 로드합니다.
+
+    models/
+      manifest.json                      # {name: {file_id, source_sha256, sha256, size, path}}
+      koelectra/<sha256>.safetensors
+      kcbert/<sha256>.safetensors
+      ...
+
+가중치를 찾는 순서
+  1) manifest 에 같은 file_id 로 등록된 파일
+  2) 시드 디렉터리(WEAKEND_MODEL_SEED_DIR)나 예전 경로(models/<name>_emotion.pt)의 로컬 파일
+  3) Google Drive 다운로드
+
+MODEL_CONFIGS 항목에 "sha256" 을 적어 두면 원본 파일(.pt 또는 .safetensors)의 체크섬을 검증하고,
+없으면 처음 받은 파일의 체크섬을 manifest 에 기록해 이후 같은 파일인지 확인합니다.
+
+    python -m utils.model_store seed <dir>   # 네트워크 없이 로컬 디렉터리에서 채우기
+    python -m utils.model_store verify       # 저장된 파일 체크섬 다시 검사
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Dict, Optional
+
+import torch
+from safetensors.torch import load_file, save_file
+
+MODEL_STORE_DIR = os.getenv("WEAKEND_MODEL_DIR", "models")
+MODEL_SEED_DIR = os.getenv("WEAKEND_MODEL_SEED_DIR", "")
+
+_manifest_lock = threading.Lock()
+
+
+class ModelStoreError(RuntimeError):
+    pass
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _manifest_path(store_dir: str) -> str:
+    return os.path.join(store_dir, "manifest.json")
+
+
+def _read_manifest(store_dir: str) -> Dict[str, dict]:
+    path = _manifest_path(store_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(store_dir: str, manifest: Dict[str, dict]) -> None:
+    # 임시 파일에 쓴 뒤 교체해서, 중간에 죽어도 manifest 가 깨지지 않게 함
+    fd, tmp = tempfile.mkstemp(dir=store_dir, suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, _manifest_path(store_dir))
+
+
+def _local_candidates(name: str, seed_dir: str, store_dir: str):
+    dirs = [d for d in (seed_dir, store_dir) if d]
+    for d in dirs:
+        for fname in (f"{name}.safetensors", f"{name}_emotion.safetensors",
+                      f"{name}.pt", f"{name}_emotion.pt"):
+            path = os.path.join(d, fname)
+            if os.path.isfile(path):
+                yield path
+
+
+def _download(file_id: str, dest: str) -> None:
+    import gdown
+    url = f"https://drive.google.com/uc?id={file_id}"
+    if gdown.download(url, dest, quiet=False) is None or not os.path.exists(dest):
+        raise ModelStoreError(f"가중치 다운로드 실패: file_id={file_id}")
+
+
+def _ingest(name: str, file_id: str, source: str, expected_sha256: Optional[str],
+            store_dir: str) -> dict:
+    """원본 파일 체크섬을 검증하고 safetensors 로 변환해 <name>/<sha256>.safetensors 로 저장"""
+    source_sha256 = _sha256_file(source)
+    if expected_sha256 and source_sha256 != expected_sha256:
+        raise ModelStoreError(
+            f"{name}: 체크섬 불일치 (expected {expected_sha256}, got {source_sha256}) - {source}"
+        )
+
+    model_dir = os.path.join(store_dir, name)
+    os.makedirs(model_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=model_dir, suffix=".safetensors")
+    os.close(fd)
+    try:
+        if source.endswith(".safetensors"):
+            with open(source, "rb") as src, open(tmp, "wb") as dst:
+                for chunk in iter(lambda: src.read(1 << 20), b""):
+                    dst.write(chunk)
+        else:
+            state_dict = torch.load(source, map_location="cpu")
+            # safetensors 는 저장소를 공유하는 텐서를 허용하지 않으므로 각각 복사해 저장
+            save_file({k: v.detach().clone().contiguous() for k, v in state_dict.items()}, tmp)
+        sha256 = _sha256_file(tmp)
+        final = os.path.join(model_dir, f"{sha256}.safetensors")
+        os.replace(tmp, final)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    return {
+        "file_id": file_id,
+        "source_sha256": source_sha256,
+        "sha256": sha256,
+        "size": os.path.getsize(final),
+        "path": os.path.relpath(final, store_dir),
+    }
+
+
+def fetch_weights(
+    name: str,
+    file_id: str,
+    sha256: Optional[str] = None,
+    store_dir: str = MODEL_STORE_DIR,
+    seed_dir: str = MODEL_SEED_DIR,
+    allow_download: bool = True,
+) -> str:
+    """모델 이름별 safetensors 가중치 경로를 반환합니다. 없으면 시드 디렉터리 → 다운로드 순으로 채움"""
+    os.makedirs(store_dir, exist_ok=True)
+    with _manifest_lock:
+        manifest = _read_manifest(store_dir)
+        entry = manifest.get(name)
+        if entry and entry["file_id"] == file_id and (not sha256 or entry["source_sha256"] == sha256):
+            path = os.path.join(store_dir, entry["path"])
+            if os.path.exists(path) and os.path.getsize(path) == entry["size"]:
+                return path
+            print(f"[Warning] {name}: 저장된 가중치가 없거나 크기가 달라 다시 가져옵니다.")
+
+        entry = None
+        for candidate in _local_candidates(name, seed_dir, store_dir):
+            try:
+                entry = _ingest(name, file_id, candidate, sha256, store_dir)
+                break
+            except ModelStoreError as e:
+                print(f"[Warning] {e}")
+
+        if entry is None:
+            if not allow_download:
+                raise ModelStoreError(f"{name}: 로컬 가중치가 없고 다운로드가 꺼져 있습니다.")
+            fd, tmp = tempfile.mkstemp(dir=store_dir, suffix=".pt")
+            os.close(fd)
+            try:
+                _download(file_id, tmp)
+                entry = _ingest(name, file_id, tmp, sha256, store_dir)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+        manifest[name] = entry
+        _write_manifest(store_dir, manifest)
+        return os.path.join(store_dir, entry["path"])
+
+
+def load_weights(path: str) -> Dict[str, torch.Tensor]:
+    """safetensors 파일을 메모리 맵으로 열어 state_dict 로 반환"""
+    return load_file(path, device="cpu")
+
+
+def verify_store(store_dir: str = MODEL_STORE_DIR) -> Dict[str, bool]:
+    """manifest 의 모든 파일 체크섬을 다시 계산해 {name: 정상 여부} 반환"""
+    result = {}
+    for name, entry in _read_manifest(store_dir).items():
+        path = os.path.join(store_dir, entry["path"])
+        result[name] = os.path.exists(path) and _sha256_file(path) == entry["sha256"]
+    return result
+
+
+def main(argv=None) -> int:
+    import argparse
+    from inference import MODEL_CONFIGS
+
+    parser = argparse.ArgumentParser(description="로컬 모델 저장소 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    seed = sub.add_parser("seed", help="로컬 디렉터리의 가중치로 저장소 채우기 (다운로드 없음)")
+    seed.add_argument("directory")
+    sub.add_parser("verify", help="저장된 가중치 체크섬 검사")
+    args = parser.parse_args(argv)
+
+    if args.command == "seed":
+        ok = True
+        for cfg in MODEL_CONFIGS:
+            try:
+                path = fetch_weights(cfg["name"], cfg["file_id"], cfg.get("sha256"),
+                                     seed_dir=args.directory, allow_download=False)
+                print(f"  {cfg['name']:<12} {path}")
+            except ModelStoreError as e:
+                ok = False
+                print(f"  {cfg['name']:<12} FAILED: {e}")
+        return 0 if ok else 1
+
+    results = verify_store()
+    for name, ok in results.items():
+        print(f"  {name:<12} {'ok' if ok else 'CORRUPT'}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
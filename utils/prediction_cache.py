@@ -0,0 +1,106 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 텍스트 정규화: 유니코드 NFC + 앞뒤 공백 제거 + 연속 공백 1칸으로"""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def model_set_version(model_configs, *extra) -> str:
+    """모델 구성(이름·가중치 id)과 추가 설정으로 만든 버전 문자열. 모델이 바뀌면 캐시도 무효화됨"""
+    payload = [(c["name"], c["file_id"], c["model_name"]) for c in model_configs]
+    raw = json.dumps([payload, list(extra)], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+class PredictionCache:
+    """
+    (label, score) 예측 결과 캐시.
+    메모리 LRU(max_entries 개) + 선택적으로 sqlite 파일(path)에 저장해 재시작 후에도 유지합니다.
+    """
+
+    def __init__(self, max_entries: int = 4096, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, label TEXT NOT NULL, score REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self._db is not None
+
+    @staticmethod
+    def make_key(version: str, text: Optional[str] = None, audio_hash: Optional[str] = None) -> str:
+        return "|".join([version, normalize_text(text) if text else "", audio_hash or ""])
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT label, score FROM predictions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    self._remember(key, (row[0], row[1]))
+                    return row[0], row[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Tuple[str, float]) -> None:
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO predictions (key, label, score) VALUES (?, ?, ?)",
+                    (key, value[0], value[1]),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, value: Tuple[str, float]) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM predictions")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,207 @@
+"""
+가벼운 구간별 지연 시간 측정
+
+    from utils.tracing import trace
+
+    with trace("db.chat_log.insert"):
+        supabase.table("chat_log").insert(...).execute()
+
+구간(stage)별로 누적 히스토그램(Prometheus 용)과 최근 N개 롤링 윈도우(p50/p95/p99 용)를
+프로세스 안에 유지합니다. 밖으로 내보내는 방법은 두 가지입니다.
+
+  - WEAKEND_METRICS_PORT=9100        → http://<host>:9100/metrics 에 Prometheus 텍스트 포맷
+  - WEAKEND_METRICS_LOG_INTERVAL=60  → 60초마다 구간별 요약을 로그 한 줄씩 출력
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import numpy as np
+
+METRICS_PORT = int(os.getenv("WEAKEND_METRICS_PORT", "0"))
+METRICS_LOG_INTERVAL = float(os.getenv("WEAKEND_METRICS_LOG_INTERVAL", "0"))
+ROLLING_WINDOW = int(os.getenv("WEAKEND_METRICS_WINDOW", "1024"))
+
+# 히스토그램 버킷 경계 (초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class StageHistogram:
+    def __init__(self, window: int = ROLLING_WINDOW):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if error:
+                self.errors += 1
+            self.recent.append(seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = list(self.recent)
+            snap = {
+                "count": self.count,
+                "errors": self.errors,
+                "sum": self.total,
+                "buckets": list(self.bucket_counts),
+            }
+        if recent:
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99])
+            snap.update(p50=float(p50), p95=float(p95), p99=float(p99))
+        return snap
+
+
+_registry: Dict[str, StageHistogram] = {}
+_registry_lock = threading.Lock()
+
+
+def _histogram(stage: str) -> StageHistogram:
+    hist = _registry.get(stage)
+    if hist is None:
+        with _registry_lock:
+            hist = _registry.setdefault(stage, StageHistogram())
+    return hist
+
+
+def observe(stage: str, seconds: float, error: bool = False) -> None:
+    _histogram(stage).observe(seconds, error)
+
+
+@contextmanager
+def trace(stage: str):
+    """with 블록 실행 시간을 stage 이름으로 기록 (예외가 나도 기록하고 그대로 전달)"""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start, error)
+
+
+def traced(stage: str):
+    """함수 전체를 trace 하는 데코레이터"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with trace(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot() -> Dict[str, dict]:
+    with _registry_lock:
+        stages = dict(_registry)
+    return {stage: hist.snapshot() for stage, hist in sorted(stages.items())}
+
+
+def render_prometheus() -> str:
+    lines = [
+        "# HELP weakend_stage_latency_seconds Latency of each chat request stage.",
+        "# TYPE weakend_stage_latency_seconds histogram",
+    ]
+    errors = []
+    for stage, snap in snapshot().items():
+        cumulative = 0
+        for bound, n in zip(BUCKETS, snap["buckets"]):
+            cumulative += n
+            lines.append(f'weakend_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'weakend_stage_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {snap["count"]}')
+        lines.append(f'weakend_stage_latency_seconds_sum{{stage="{stage}"}} {snap["sum"]:.6f}')
+        lines.append(f'weakend_stage_latency_seconds_count{{stage="{stage}"}} {snap["count"]}')
+        errors.append(f'weakend_stage_errors_total{{stage="{stage}"}} {snap["errors"]}')
+    lines += ["# HELP weakend_stage_errors_total Stage executions that raised.",
+              "# TYPE weakend_stage_errors_total counter"] + errors
+    return "\n".join(lines) + "\n"
+
+
+def format_summary() -> str:
+    parts = []
+    for stage, snap in snapshot().items():
+        if "p50" in snap:
+            parts.append(f"{stage} n={snap['count']} p50={snap['p50'] * 1000:.1f}ms "
+                         f"p95={snap['p95'] * 1000:.1f}ms p99={snap['p99'] * 1000:.1f}ms")
+    return " | ".join(parts)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 내보내기: /metrics 엔드포인트, 주기적 로그
+# ─────────────────────────────────────────────────────────────────────────────
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_started_lock = threading.Lock()
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_log_thread: Optional[threading.Thread] = None
+
+
+def start_metrics_server(port: int) -> Optional[ThreadingHTTPServer]:
+    global _metrics_server
+    with _started_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError as e:
+                # Streamlit 워커가 여러 개면 같은 포트를 먼저 잡은 프로세스만 노출
+                print(f"[Warning] metrics server not started on port {port}: {e}")
+                return None
+            threading.Thread(target=_metrics_server.serve_forever,
+                             name="metrics-server", daemon=True).start()
+        return _metrics_server
+
+
+def start_periodic_log(interval: float) -> threading.Thread:
+    global _log_thread
+
+    def _run():
+        while True:
+            time.sleep(interval)
+            summary = format_summary()
+            if summary:
+                print(f"[metrics] {summary}")
+
+    with _started_lock:
+        if _log_thread is None:
+            _log_thread = threading.Thread(target=_run, name="metrics-log", daemon=True)
+            _log_thread.start()
+        return _log_thread
+
+
+def start_from_env() -> None:
+    """환경 변수에 설정된 내보내기만 시작 (여러 번 불러도 한 번만 시작)"""
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    if METRICS_LOG_INTERVAL > 0:
+        start_periodic_log(METRICS_LOG_INTERVAL)